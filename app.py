@@ -8,6 +8,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 import streamlit as st
 from core.db_manager import init_db
 from core.scheduler import init_scheduler_from_settings, is_running
+from core.batch_runner import resume_interrupted_runs_in_background
 
 # ── 페이지 설정 ──
 st.set_page_config(
@@ -25,6 +26,9 @@ if "scheduler_initialized" not in st.session_state:
     init_scheduler_from_settings()
     st.session_state.scheduler_initialized = True
 
+# ── 중단된 일괄 체크 재개 (프로세스 당 1회, 백그라운드) ──
+resume_interrupted_runs_in_background()
+
 # ── 커스텀 CSS ──
 st.markdown("""
 <style>
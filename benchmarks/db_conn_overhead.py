@@ -0,0 +1,67 @@
+"""
+DB 호출당 커넥션 오버헤드 마이크로 벤치마크.
+
+호출마다 connect + PRAGMA + close 하던 기존 방식과, 스레드별 커넥션을
+재사용하는 현재 get_conn()의 호출당 시간을 같은 쿼리로 비교한다.
+
+    python benchmarks/db_conn_overhead.py [반복 횟수]
+"""
+import sys
+import time
+import sqlite3
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+
+
+@contextmanager
+def _per_call_conn(path: str):
+    """기존 get_conn() — 호출마다 새 커넥션"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _bench(label: str, conn_factory, n: int) -> float:
+    query = "SELECT value FROM settings WHERE key = ?"
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with conn_factory() as conn:
+            conn.execute(query, ("alert_threshold",)).fetchone()
+    per_call_us = (time.perf_counter() - t0) / n * 1e6
+    print(f"{label:<28} {per_call_us:9.1f} µs/call")
+    return per_call_us
+
+
+def main(n: int = 2000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        config.DB_PATH = db_path
+
+        from core import db_manager
+        db_manager.DB_PATH = db_path
+        db_manager.init_db()
+        db_manager.set_setting("alert_threshold", "5")
+
+        print(f"get_setting 형태 쿼리 {n:,}회")
+        before = _bench("per-call connect (기존)", lambda: _per_call_conn(str(db_path)), n)
+        after = _bench("thread-local reuse (현재)", db_manager.get_conn, n)
+        print(f"{'speedup':<28} {before / after:9.1f}x")
+        db_manager.close_connections()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
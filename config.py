@@ -28,20 +28,42 @@ def _get_secret(key: str, default: str = "") -> str:
 NAVER_CLIENT_ID = _get_secret("NAVER_CLIENT_ID")
 NAVER_CLIENT_SECRET = _get_secret("NAVER_CLIENT_SECRET")
 
+# 추가 API 키 — "id1:secret1,id2:secret2" 형식, 일일 호출 한도를 키 여러 개로 분산
+NAVER_API_KEYS = _get_secret("NAVER_API_KEYS")
+
+
+def _parse_credentials() -> list:
+    """[(client_id, client_secret), ...] — 기본 키 + 추가 키 (중복 제거)"""
+    creds = []
+    if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET:
+        creds.append((NAVER_CLIENT_ID, NAVER_CLIENT_SECRET))
+    for pair in NAVER_API_KEYS.split(","):
+        client_id, _, secret = pair.partition(":")
+        client_id, secret = client_id.strip(), secret.strip()
+        if client_id and secret and (client_id, secret) not in creds:
+            creds.append((client_id, secret))
+    return creds
+
+
 # 네이버 쇼핑 API
 NAVER_SHOP_API_URL = "https://openapi.naver.com/v1/search/shop.json"
-NAVER_API_HEADERS = {
-    "X-Naver-Client-Id": NAVER_CLIENT_ID,
-    "X-Naver-Client-Secret": NAVER_CLIENT_SECRET,
-}
+NAVER_API_CREDENTIALS = _parse_credentials()
+NAVER_DAILY_QUOTA = 25000  # 애플리케이션(키)당 일일 호출 한도
 
 # 순위 체크 설정
 MAX_PAGES = 10           # 최대 탐색 페이지 (100건 × 10 = 1000위)
 ITEMS_PER_PAGE = 100     # 페이지당 항목 수
-RATE_LIMIT_DELAY = 0.12  # API 호출 간 대기 (초)
+RATE_LIMIT_PER_SEC = 8   # 초당 API 호출 수 (토큰 버킷 충전 속도)
+RATE_LIMIT_BURST = 4     # 토큰 버킷 최대 적립량
 REQUEST_TIMEOUT = 15     # 요청 타임아웃 (초)
 MAX_RETRIES = 3          # 최대 재시도 횟수
+RETRY_BACKOFF_BASE = 0.5 # 재시도 백오프 기본 대기 (초, 지수 증가 + jitter)
+RETRY_BACKOFF_MAX = 30   # 재시도 백오프 최대 대기 (초)
 EARLY_STOP_PAGES = 2     # 매칭 발견 후 연속 미발견 시 중단 페이지 수
+PROBE_PRIOR_RANK = True  # 이전 순위 페이지까지 먼저 조회, 첫 매칭 확인 즉시 중단 (False면 EARLY_STOP_PAGES 사용)
+MAX_CONCURRENCY = 8      # 동시 요청 수 상한 (429 수신 시 자동 축소)
+HTTP_POOL_SIZE = 10      # API 호스트당 유지할 keep-alive 커넥션 수
+CHECK_JOB_WORKERS = 2    # 백그라운드 일괄 체크 작업 동시 실행 수 (프로세스 공용 워커 풀)
 
 # DB — Streamlit Cloud는 /tmp에만 쓰기 가능
 BASE_DIR = Path(__file__).resolve().parent
@@ -51,6 +73,32 @@ if not os.access(str(_data_dir), os.W_OK):
 _data_dir.mkdir(parents=True, exist_ok=True)
 DB_PATH = _data_dir / "tracker.db"
 
+# 차트 — 시리즈별 점 개수를 차트 폭(px)에 맞춰 다운샘플링
+CHART_WIDTH_PX = 1000         # 시리즈당 최대 점 개수 (대략 차트 가로 픽셀)
+CHART_DOWNSAMPLE = "lttb"     # 'lttb' 또는 'minmax'
+CHART_TOP_N = 10              # 대시보드 기본 표시 키워드 수 (현재 순위 상위)
+CHART_WEBGL_POINTS = 2000     # 전체 점이 이보다 많으면 WebGL(Scattergl)로 렌더링
+CHART_MARKER_POINTS = 300     # 전체 점이 이보다 적을 때만 마커 표시
+
+# 이력 조회 해상도 — 조회 기간에 따라 원본/시간별/일별 롤업 자동 선택
+HISTORY_RAW_MAX_DAYS = 7      # 이 기간 이하면 원본 이력 (시간별 체크면 롤업해도 줄지 않음)
+HISTORY_HOURLY_MAX_DAYS = 14  # 이 기간 이하면 시간별 롤업, 초과면 일별 롤업
+
+# 보관 정책 — N일 지난 원본 이력/알림 로그를 월별 압축 아카이브로 이동 (롤업은 유지)
+ARCHIVE_DIR = _data_dir / "archive"
+RETENTION_DAYS = 180          # 기본 보관 기간 (설정 탭에서 변경, 0이면 사용 안 함)
+VACUUM_STEP_PAGES = 256       # incremental_vacuum 1회에 반환할 페이지 수
+VACUUM_MAX_STEPS = 40         # 보관 정책 1회 실행당 최대 vacuum 단계 수
+
+# 정기 백업 — 스케줄 체크 후 압축 스냅샷 저장, 최신 N개만 보관
+BACKUP_DIR = _data_dir / "backups"
+BACKUP_KEEP = 7               # 기본 보관 개수 (설정 탭에서 변경, 0이면 정기 백업 안 함)
+
+# SERP 페이지 캐시 — (검색어, 시작 위치, 정렬) 단위, 세션/프로세스 간 공유
+SERP_CACHE_PATH = _data_dir / "serp_cache.db"
+SERP_CACHE_TTL = 600        # 캐시 유효 시간 (초), 0이면 캐시 사용 안 함
+SERP_CACHE_MAX_MB = 50      # 캐시 파일 최대 크기 (압축 후 기준)
+
 # 정렬 옵션
 SORT_OPTIONS = {
     "sim": "정확도순",
@@ -5,7 +5,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
 
-from core.db_manager import get_setting, add_alert_log
+from core.db_manager import get_settings_snapshot, add_alert_logs
 
 logger = logging.getLogger(__name__)
 
@@ -68,10 +68,11 @@ def _build_alert_html(alerts: list) -> str:
 
 def _get_smtp_config() -> dict:
     """설정에서 SMTP 정보 조회"""
+    settings = get_settings_snapshot()
     return {
-        "email": get_setting("gmail_address", ""),
-        "password": get_setting("gmail_app_password", ""),
-        "recipient": get_setting("alert_recipient", ""),
+        "email": settings.get("gmail_address", ""),
+        "password": settings.get("gmail_app_password", ""),
+        "recipient": settings.get("alert_recipient", ""),
     }
 
 
@@ -108,8 +109,11 @@ def send_alert(alerts: list) -> bool:
             server.sendmail(config["email"], config["recipient"], msg.as_string())
 
         # 알림 로그 기록
-        for a in alerts:
-            add_alert_log(a["keyword_id"], a["alert_type"], f"{a['keyword']}: {a.get('change','')}")
+        add_alert_logs([{
+            "keyword_id": a["keyword_id"],
+            "alert_type": a["alert_type"],
+            "message": f"{a['keyword']}: {a.get('change','')}",
+        } for a in alerts])
 
         logger.info(f"알림 이메일 발송 완료: {len(alerts)}건")
         return True
@@ -126,11 +130,12 @@ def check_and_send_alerts(check_results: list, prev_ranks: dict):
         check_results: check_all_keywords 반환값
         prev_ranks: {keyword_id: prev_rank_int_or_None}
     """
-    threshold = int(get_setting("alert_threshold", "5"))
-    alert_top10 = get_setting("alert_top10", "1") == "1"
-    alert_lost = get_setting("alert_lost", "1") == "1"
-    alert_new = get_setting("alert_new", "1") == "1"
-    alerts_enabled = get_setting("alerts_enabled", "0") == "1"
+    settings = get_settings_snapshot()
+    threshold = int(settings.get("alert_threshold", "5"))
+    alert_top10 = settings.get("alert_top10", "1") == "1"
+    alert_lost = settings.get("alert_lost", "1") == "1"
+    alert_new = settings.get("alert_new", "1") == "1"
+    alerts_enabled = settings.get("alerts_enabled", "0") == "1"
 
     if not alerts_enabled:
         return
@@ -0,0 +1,148 @@
+"""네이버 API 키 풀 — 여러 키에 호출 분산 + 키별 일일 호출 수 DB 기록"""
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Optional, List, Dict
+
+from config import NAVER_API_CREDENTIALS, NAVER_DAILY_QUOTA
+from core.db_manager import add_api_key_calls, set_api_key_status, get_api_key_usage
+
+logger = logging.getLogger(__name__)
+
+QUOTA_EXCEEDED_CODE = "010"  # 429 응답 중 일일 한도 소진 에러 코드
+RELOAD_INTERVAL = 60         # 다른 프로세스의 사용량 반영 주기 (초)
+
+STATUS_OK = "ok"
+STATUS_EXHAUSTED = "exhausted"
+STATUS_AUTH_ERROR = "auth_error"
+
+
+@dataclass(frozen=True)
+class ApiCredential:
+    client_id: str
+    client_secret: str
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-Naver-Client-Id": self.client_id,
+            "X-Naver-Client-Secret": self.client_secret,
+        }
+
+    @property
+    def masked_id(self) -> str:
+        return f"{self.client_id[:4]}…{self.client_id[-2:]}" if len(self.client_id) > 6 else "****"
+
+
+def _today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def _log_write_error(fut):
+    if fut.exception() is not None:
+        logger.warning(f"API 키 사용량 기록 실패: {fut.exception()}")
+
+
+class ApiKeyPool:
+    """
+    호출 수가 가장 적은 사용 가능한 키를 고른다.
+
+    오늘 한도에 도달했거나 한도 소진/인증 실패 응답을 받은 키는 그날 건너뛴다.
+    호출 수는 호출마다 DB에 누적하고, 다른 프로세스가 쓴 사용량은
+    RELOAD_INTERVAL마다 다시 읽어 반영한다.
+    """
+
+    def __init__(self, credentials: List[tuple], daily_quota: int):
+        self.credentials = [ApiCredential(cid, secret) for cid, secret in credentials]
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        self._date = None
+        self._loaded_at = 0.0
+        self._calls = {}   # client_id → 오늘 호출 수
+        self._status = {}  # client_id → 오늘 상태
+
+    def _sync(self):
+        """날짜가 바뀌었거나 재조회 주기가 지났으면 DB에서 오늘 사용량 로드 (lock 안에서 호출)"""
+        today = _today()
+        if today == self._date and time.monotonic() - self._loaded_at < RELOAD_INTERVAL:
+            return
+        try:
+            rows = {r["client_id"]: r for r in get_api_key_usage(today)}
+        except sqlite3.Error as e:
+            logger.warning(f"API 키 사용량 조회 실패: {e}")
+            rows = {}
+        if today != self._date:
+            self._calls, self._status = {}, {}
+        for cred in self.credentials:
+            row = rows.get(cred.client_id)
+            if row:
+                self._calls[cred.client_id] = max(self._calls.get(cred.client_id, 0), row["calls"])
+                if row["status"] != STATUS_OK:
+                    self._status[cred.client_id] = row["status"]
+        self._date = today
+        self._loaded_at = time.monotonic()
+
+    def _available(self, cred: ApiCredential) -> bool:
+        return (self._status.get(cred.client_id, STATUS_OK) == STATUS_OK
+                and self._calls.get(cred.client_id, 0) < self.daily_quota)
+
+    def acquire(self) -> Optional[ApiCredential]:
+        """호출 1건에 쓸 키 선택 (없으면 None)"""
+        with self._lock:
+            self._sync()
+            candidates = [c for c in self.credentials if self._available(c)]
+            if not candidates:
+                return None
+            cred = min(candidates, key=lambda c: self._calls.get(c.client_id, 0))
+            self._calls[cred.client_id] = self._calls.get(cred.client_id, 0) + 1
+            return cred
+
+    def report(self, cred: ApiCredential, status_code: Optional[int], error_code: Optional[str] = None):
+        """호출 결과 기록 — 사용량 누적, 한도 소진/인증 실패 키는 오늘 제외"""
+        new_status = None
+        if status_code in (401, 403):
+            new_status = STATUS_AUTH_ERROR
+            logger.error(f"API 키 인증 실패 ({cred.masked_id}) — 오늘 사용 중지")
+        elif status_code == 429 and error_code == QUOTA_EXCEEDED_CODE:
+            new_status = STATUS_EXHAUSTED
+            logger.warning(f"API 키 일일 한도 소진 ({cred.masked_id}) — 다음 키로 전환")
+
+        with self._lock:
+            date = self._date or _today()
+            if new_status:
+                self._status[cred.client_id] = new_status
+        # 쓰기 큐에 넣고 기다리지 않는다 — 호출 경로가 DB 쓰기에 막히지 않게
+        futures = [add_api_key_calls(cred.client_id, date, 1, 0 if status_code == 200 else 1, wait=False)]
+        if new_status:
+            futures.append(set_api_key_status(cred.client_id, date, new_status, wait=False))
+        for fut in futures:
+            fut.add_done_callback(_log_write_error)
+
+    def remaining_today(self) -> int:
+        """사용 가능한 키들의 오늘 남은 호출 수 합계"""
+        with self._lock:
+            self._sync()
+            return sum(
+                self.daily_quota - self._calls.get(c.client_id, 0)
+                for c in self.credentials if self._available(c)
+            )
+
+    def get_usage(self) -> List[Dict]:
+        """키별 오늘 사용량 (설정 화면 표시용)"""
+        with self._lock:
+            self._loaded_at = 0.0  # 최신값 강제 로드
+            self._sync()
+            return [{
+                "client_id": c.masked_id,
+                "calls": self._calls.get(c.client_id, 0),
+                "quota": self.daily_quota,
+                "remaining": max(0, self.daily_quota - self._calls.get(c.client_id, 0)),
+                "status": self._status.get(c.client_id, STATUS_OK),
+            } for c in self.credentials]
+
+
+# 프로세스 공용 키 풀
+key_pool = ApiKeyPool(NAVER_API_CREDENTIALS, NAVER_DAILY_QUOTA)
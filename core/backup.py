@@ -0,0 +1,99 @@
+"""DB 백업 — SQLite 온라인 백업 API로 일관된 스냅샷을 떠서 gzip으로 압축"""
+import os
+import gzip
+import shutil
+import sqlite3
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+
+from config import DB_PATH, BACKUP_DIR, BACKUP_KEEP
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK = 1024 * 1024      # gzip 압축 시 읽기 단위 (바이트)
+
+
+def _snapshot(dest: Path):
+    """
+    라이브 DB → dest(SQLite 파일)로 온라인 백업 (WAL 내용 포함).
+
+    한 번의 읽기 트랜잭션으로 복사한다 — WAL 모드라 체크 쓰기는 막히지 않고,
+    여러 단계로 나누면 단계 사이의 쓰기 때문에 백업이 처음부터 다시 시작될 수 있다.
+    """
+    src = sqlite3.connect(str(DB_PATH), timeout=30)
+    dst = sqlite3.connect(str(dest))
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def create_backup(dest_dir: Optional[Path] = None) -> Path:
+    """
+    압축 백업 파일 생성.
+
+    Args:
+        dest_dir: 저장 폴더 (None이면 임시 폴더 — 다운로드용)
+
+    Returns:
+        생성된 .db.gz 경로 (시각 뒤에 임의 문자열 — 같은 초에 여러 번 백업해도 겹치지 않음)
+    """
+    dest_dir = Path(dest_dir) if dest_dir else Path(tempfile.gettempdir())
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    prefix = f"tracker_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_"
+    fd, final = tempfile.mkstemp(prefix=prefix, suffix=".db.gz", dir=str(dest_dir))
+    os.close(fd)
+    final = Path(final)
+
+    fd, snap = tempfile.mkstemp(suffix=".db", dir=str(dest_dir))
+    os.close(fd)
+    fd, tmp_gz = tempfile.mkstemp(suffix=".db.gz.part", dir=str(dest_dir))
+    os.close(fd)
+    try:
+        _snapshot(Path(snap))
+        with open(snap, "rb") as src, gzip.open(tmp_gz, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+        os.replace(tmp_gz, final)
+    except BaseException:
+        final.unlink(missing_ok=True)
+        raise
+    finally:
+        for p in (snap, tmp_gz):
+            try:
+                os.unlink(p)
+            except FileNotFoundError:
+                pass
+
+    logger.info(f"DB 백업 생성: {final} ({final.stat().st_size / (1024 * 1024):.2f} MB)")
+    return final
+
+
+def list_backups() -> List[Path]:
+    """BACKUP_DIR의 정기 백업 목록 (최신순)"""
+    if not BACKUP_DIR.exists():
+        return []
+    return sorted(BACKUP_DIR.glob("tracker_backup_*.db.gz"), reverse=True)
+
+
+def rotate_backups(keep: int = BACKUP_KEEP) -> int:
+    """최신 keep개만 남기고 삭제 — 삭제한 파일 수 반환"""
+    removed = 0
+    for path in list_backups()[keep:]:
+        path.unlink()
+        removed += 1
+    return removed
+
+
+def run_scheduled_backup(keep: int = BACKUP_KEEP) -> Optional[Path]:
+    """정기 백업 1회 + 보관 개수 정리 (keep이 0이면 건너뜀)"""
+    if keep <= 0:
+        return None
+    path = create_backup(BACKUP_DIR)
+    removed = rotate_backups(keep)
+    if removed:
+        logger.info(f"오래된 백업 {removed}개 삭제")
+    return path
@@ -0,0 +1,340 @@
+"""체크포인트 기반 일괄 순위 체크 — 결과 즉시 저장, 중단된 실행 재개, 백그라운드 작업"""
+import time
+import queue
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple, Callable
+
+from config import CHECK_JOB_WORKERS
+from core.db_manager import (
+    get_latest_ranks, set_setting, ACTIVE_RUN_STATUSES,
+    create_check_run, start_check_run, touch_check_run, complete_check_run_items, finish_check_run,
+    claim_stale_check_runs, get_check_run, get_check_run_items, get_check_run_results,
+)
+from core.rank_checker import RankResult, check_all_keywords
+from core.alert_sender import check_and_send_alerts
+
+logger = logging.getLogger(__name__)
+
+STALE_MINUTES = 5      # heartbeat가 이 시간 넘게 멈춘 running 실행은 중단된 것으로 본다
+FLUSH_EVERY = 20       # 결과 N건마다 한 트랜잭션으로 저장
+FLUSH_INTERVAL = 1.0   # 또는 마지막 저장 후 N초가 지나면 저장
+WAIT_POLL = 5.0        # 같은 키워드 집합의 실행이 끝나기를 기다릴 때 상태 조회 주기 (초)
+HEARTBEAT_INTERVAL = 60.0  # 결과 저장과 별도로 heartbeat를 갱신하는 주기 (초) — STALE_MINUTES보다 충분히 짧게
+
+_active_runs = set()  # 이 프로세스에서 대기/진행 중인 run_id
+_active_lock = threading.Lock()
+_resume_started = False
+_resume_pending = False
+
+
+class _JobPool:
+    """
+    체크 작업 공용 워커 풀 — 세션(스크립트 스레드)과 무관하게 프로세스 안에서 계속 실행된다.
+
+    데몬 스레드라 프로세스 종료 때 진행 중인 체크를 기다리지 않는다
+    (그 실행은 running으로 남고 다음 시작 때 재개된다).
+    """
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args):
+        with self._lock:
+            if not self._threads:
+                for i in range(self._workers):
+                    t = threading.Thread(target=self._run, name=f"check-job-{i}", daemon=True)
+                    t.start()
+                    self._threads.append(t)
+        self._queue.put((fn, args))
+
+    def _run(self):
+        while True:
+            fn, args = self._queue.get()
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("백그라운드 작업 실패")
+
+
+_pool = _JobPool(CHECK_JOB_WORKERS)
+
+
+def keyset_of(keywords: List[Dict]) -> str:
+    """키워드 집합 키 — 순서/탐색 한도와 무관하게 같은 키워드 id 집합이면 같은 값"""
+    ids = ",".join(str(i) for i in sorted({kw["id"] for kw in keywords}))
+    return hashlib.sha1(ids.encode()).hexdigest()
+
+
+def _load_results(run_id: int) -> Tuple[List[Dict], Dict[int, Optional[int]]]:
+    """저장된 실행 결과 → (check_all_keywords 형식 결과, {keyword_id: 실행 시작 시점 순위})"""
+    results, prev_ranks = [], {}
+    for r in get_check_run_results(run_id):
+        results.append({
+            "keyword_id": r["keyword_id"],
+            "keyword": r["keyword"],
+            "result": RankResult(
+                rank=r["rank"], title=r["title"] or "", mall_name=r["mall_name"] or "",
+                price=r["price"] or 0, link=r["link"] or "", product_id=r["product_id"] or "",
+                total_searched=r["total_searched"] or 0,
+            ),
+        })
+        prev_ranks[r["keyword_id"]] = r["prev_rank"]
+    return results, prev_ranks
+
+
+def _heartbeat(run_id: int, stop: threading.Event):
+    """실행 중 HEARTBEAT_INTERVAL마다 heartbeat 갱신 — 페이지가 많은 그룹 하나가 오래 걸려도 재개 대상이 되지 않게"""
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        try:
+            touch_check_run(run_id)
+        except Exception:
+            logger.exception(f"일괄 체크 #{run_id} heartbeat 갱신 실패")
+
+
+def _execute(run_id: int, source: str, keywords: List[Dict],
+             prior_ranks: Dict[int, Optional[int]], progress_callback=None) -> List[Dict]:
+    """pending 키워드 체크 → 결과를 작은 묶음으로 바로 저장 → 완료 처리 + 후처리"""
+    buffer = []
+    pending = []  # 쓰기 큐에 넣은 저장 작업 (체크는 COMMIT을 기다리지 않고 계속)
+    last_flush = time.monotonic()
+
+    def flush(wait: bool = False):
+        nonlocal last_flush
+        if buffer:
+            pending.append(complete_check_run_items(run_id, buffer, wait=False))
+            buffer.clear()
+        last_flush = time.monotonic()
+        if wait:
+            for fut in pending:
+                fut.result()
+            pending.clear()
+
+    def on_result(cr: Dict):
+        r = cr["result"]
+        buffer.append({
+            "keyword_id": cr["keyword_id"],
+            "rank": r.rank, "title": r.title, "mall_name": r.mall_name,
+            "price": r.price, "link": r.link, "product_id": r.product_id,
+            "total_searched": r.total_searched,
+        })
+        if len(buffer) >= FLUSH_EVERY or time.monotonic() - last_flush >= FLUSH_INTERVAL:
+            flush()
+
+    with _active_lock:
+        _active_runs.add(run_id)
+    stop_heartbeat = threading.Event()
+    try:
+        start_check_run(run_id)
+        threading.Thread(target=_heartbeat, args=(run_id, stop_heartbeat),
+                         name=f"check-heartbeat-{run_id}", daemon=True).start()
+        check_all_keywords(
+            keywords, progress_callback=progress_callback,
+            prior_ranks=prior_ranks, result_callback=on_result,
+        )
+        flush(wait=True)
+    except Exception as e:
+        try:
+            flush(wait=True)  # 중단 전까지 나온 결과는 남긴다
+        except Exception:
+            logger.exception(f"일괄 체크 #{run_id} 결과 저장 실패")
+        logger.exception(f"일괄 체크 #{run_id} 실패")
+        # 실패로 기록해 키워드 집합을 풀어 준다 — running으로 남는 것은 프로세스가 죽은 실행뿐이고,
+        # 그 실행은 heartbeat가 멈추면 재개 대상이 된다
+        try:
+            finish_check_run(run_id, "failed", error=f"{type(e).__name__}: {e}")
+        except Exception:
+            logger.exception(f"일괄 체크 #{run_id} 실패 기록 실패")
+        raise
+    finally:
+        stop_heartbeat.set()
+        with _active_lock:
+            _active_runs.discard(run_id)
+
+    # 재개된 실행이면 중단 전 결과까지 포함, 비교 기준은 실행 시작 시점 순위
+    results, prev_ranks = _load_results(run_id)
+    finish_check_run(run_id, "completed")
+    _after_run(run_id, source, results, prev_ranks)
+    return results
+
+
+def _after_run(run_id: int, source: str, results: List[Dict],
+               prev_ranks: Dict[int, Optional[int]]):
+    """완료 후처리 — 스케줄 실행이면 알림 발송 + 마지막 체크 시각 기록"""
+    if source == "schedule":
+        check_and_send_alerts(results, prev_ranks)
+        set_setting("last_check_time", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    logger.info(f"일괄 체크 #{run_id} 완료: {len(results)}건")
+
+
+def run_batch(keywords: List[Dict], source: str,
+              prior_ranks: Optional[Dict[int, Optional[int]]] = None,
+              progress_callback=None) -> List[Dict]:
+    """
+    체크포인트를 남기며 일괄 순위 체크.
+
+    Args:
+        keywords: 체크할 키워드 목록 (max_pages가 있으면 행별 탐색 한도)
+        source: 'schedule'이면 완료 후 알림 발송 + 마지막 체크 시각 기록, 'manual'은 저장만
+        prior_ranks: {keyword_id: 직전 순위} (기본: 현재 최신 순위)
+        progress_callback: (current, total, keyword) 콜백
+
+    Returns:
+        [{keyword_id, keyword, result: RankResult}, ...]
+
+    같은 키워드 집합의 실행(수동 작업 포함)이 진행 중이면 끝날 때까지 기다렸다가
+    그 결과로 후처리한다 — 그 실행이 실패했으면 새로 실행한다.
+    """
+    if prior_ranks is None:
+        prior_ranks = {r["keyword_id"]: r["rank"] for r in get_latest_ranks()}
+
+    run_id, created = _create_run(keywords, source, prior_ranks, "running")
+    while not created:
+        logger.info(f"같은 키워드 집합의 일괄 체크 #{run_id} 진행 중 — 끝날 때까지 대기")
+        run = _wait_for_run(run_id)
+        if run is not None and run["status"] == "completed":
+            results, prev_ranks = _load_results(run_id)
+            _after_run(run_id, source, results, prev_ranks)
+            return results
+        run_id, created = _create_run(keywords, source, prior_ranks, "running")
+    logger.info(f"일괄 체크 #{run_id} 시작 ({source}): {len(keywords)}개 키워드")
+
+    return _execute(run_id, source, keywords, prior_ranks, progress_callback)
+
+
+def _create_run(keywords: List[Dict], source: str,
+                prior_ranks: Dict[int, Optional[int]], status: str) -> Tuple[int, bool]:
+    return create_check_run(source, [{
+        "keyword_id": kw["id"],
+        "prev_rank": prior_ranks.get(kw["id"]),
+        "max_pages": kw.get("max_pages"),
+    } for kw in keywords], keyset=keyset_of(keywords), status=status)
+
+
+def is_stale_run(run: Dict) -> bool:
+    """heartbeat가 STALE_MINUTES 넘게 멈춘 대기/진행 중 실행인지 (이 프로세스에서 진행 중이면 False)"""
+    if run["status"] not in ACTIVE_RUN_STATUSES:
+        return False
+    with _active_lock:
+        if run["id"] in _active_runs:
+            return False
+    beat = datetime.strptime(run["heartbeat_at"], "%Y-%m-%d %H:%M:%S")
+    return datetime.now() - beat > timedelta(minutes=STALE_MINUTES)
+
+
+def _wait_for_run(run_id: int) -> Optional[Dict]:
+    """실행이 끝날 때까지 대기 — 중단된 실행이면 직접 재개"""
+    while True:
+        run = get_check_run(run_id)
+        if run is None or run["status"] not in ACTIVE_RUN_STATUSES:
+            return run
+        if is_stale_run(run):
+            resume_interrupted_runs()
+        time.sleep(WAIT_POLL)
+
+
+def resume_run(run: Dict, progress_callback=None) -> List[Dict]:
+    """중단된 실행을 남은 키워드부터 재개"""
+    run_id = run["id"]
+    items = get_check_run_items(run_id)
+    prior_ranks = {i["keyword_id"]: i["prev_rank"] for i in items}
+    pending = [{
+        "id": i["keyword_id"],
+        "keyword": i["keyword"],
+        "target_type": i["target_type"],
+        "target_value": i["target_value"],
+        "sort_type": i["sort_type"],
+        "max_pages": i["max_pages"],
+    } for i in items if i["status"] == "pending"]
+
+    logger.info(f"일괄 체크 #{run_id} 재개: 남은 {len(pending)}/{run['total']}개")
+    return _execute(run_id, run["source"], pending, prior_ranks, progress_callback)
+
+
+def resume_interrupted_runs() -> int:
+    """중단된 실행을 모두 재개 (재개한 실행 수 반환)"""
+    resumed = 0
+    for run in claim_stale_check_runs(STALE_MINUTES):
+        with _active_lock:
+            if run["id"] in _active_runs:
+                continue
+        try:
+            resume_run(run)
+            resumed += 1
+        except Exception:
+            logger.exception(f"일괄 체크 #{run['id']} 재개 실패")
+    return resumed
+
+
+def resume_interrupted_runs_in_background():
+    """프로세스당 1회, 중단된 실행 재개를 작업 풀에서 시작"""
+    global _resume_started
+    with _active_lock:
+        if _resume_started:
+            return
+        _resume_started = True
+    request_resume()
+
+
+def request_resume():
+    """중단된 실행 재개를 작업 풀에 예약 (이미 예약돼 있으면 무시)"""
+    global _resume_pending
+    with _active_lock:
+        if _resume_pending:
+            return
+        _resume_pending = True
+    _pool.submit(_resume_task)
+
+
+def _resume_task():
+    global _resume_pending
+    with _active_lock:
+        _resume_pending = False
+    resume_interrupted_runs()
+
+
+# ── 백그라운드 작업 ──
+
+def _run_job(run_id: int, source: str, keywords: List[Dict],
+             prior_ranks: Dict[int, Optional[int]]):
+    """워커 풀에서 실행 — 실패 사유는 _execute가 작업 테이블에 남긴다 (저장된 결과는 유지)"""
+    try:
+        _execute(run_id, source, keywords, prior_ranks)
+    except Exception:
+        pass  # _execute에서 기록 + 로그
+    finally:
+        with _active_lock:
+            _active_runs.discard(run_id)
+
+
+def submit_check_job(keywords: List[Dict], source: str = "manual",
+                     prior_ranks: Optional[Dict[int, Optional[int]]] = None) -> Tuple[int, bool]:
+    """
+    일괄 체크를 백그라운드 작업으로 제출 (바로 반환).
+
+    진행 상황은 get_check_run(run_id)의 status/done/total로 조회한다.
+
+    Returns:
+        (run_id, 새로 제출했는지) — 같은 키워드 집합의 작업이 대기/진행 중이면 (그 작업 id, False).
+        그 작업이 중단된 것이면 재개를 예약한다.
+    """
+    if prior_ranks is None:
+        prior_ranks = {r["keyword_id"]: r["rank"] for r in get_latest_ranks()}
+
+    run_id, created = _create_run(keywords, source, prior_ranks, "queued")
+    if created:
+        with _active_lock:
+            _active_runs.add(run_id)
+        _pool.submit(_run_job, run_id, source, keywords, prior_ranks)
+        logger.info(f"일괄 체크 #{run_id} 작업 제출 ({source}): {len(keywords)}개 키워드")
+    else:
+        run = get_check_run(run_id)
+        if run is not None and is_stale_run(run):
+            request_resume()
+    return run_id, created
@@ -0,0 +1,113 @@
+"""페이지 데이터 캐시 — DB 데이터 버전을 키로 st.cache_data에 보관
+
+화면 데이터를 바꾸는 쓰기가 COMMIT될 때마다 meta.data_version이 바뀌므로, 데이터가 그대로면
+재실행/다른 세션에서도 메모리의 결과를 쓰고 바뀐 순간에만 다시 읽는다.
+반환값은 st.cache_data가 호출마다 복사해 주므로 수정해도 캐시에 영향이 없다.
+"""
+from typing import Optional, List, Dict
+
+import streamlit as st
+
+from core.db_manager import (
+    get_data_version, get_keywords, search_keywords, count_keywords,
+    get_latest_ranks, get_rank_history, get_rank_history_page, count_rank_history,
+    get_all_rank_history, get_settings_snapshot, get_alert_logs,
+)
+
+MAX_ENTRIES = 16  # 함수별 보관 개수 — 지난 버전 항목은 곧 밀려난다
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _keywords(version: int, active_only: bool) -> List[Dict]:
+    return get_keywords(active_only=active_only)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _keyword_page(version: int, query: str, active: Optional[bool],
+                  limit: int, offset: int) -> List[Dict]:
+    return search_keywords(query, active=active, limit=limit, offset=offset)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _keyword_count(version: int, query: str, active: Optional[bool]) -> int:
+    return count_keywords(query, active=active)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _latest_ranks(version: int) -> List[Dict]:
+    return get_latest_ranks()
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _rank_history(version: int, keyword_id: int, days: int) -> List[Dict]:
+    return get_rank_history(keyword_id, days=days)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _rank_history_page(version: int, keyword_id: int, days: int, limit: int, offset: int) -> List[Dict]:
+    return get_rank_history_page(keyword_id, days=days, limit=limit, offset=offset)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _rank_history_count(version: int, keyword_id: int, days: int) -> int:
+    return count_rank_history(keyword_id, days=days)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _all_rank_history(version: int, days: int) -> List[Dict]:
+    return get_all_rank_history(days=days)
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _settings(version: int) -> Dict[str, str]:
+    return get_settings_snapshot()
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def _alert_logs(version: int, limit: int) -> List[Dict]:
+    return get_alert_logs(limit=limit)
+
+
+def keywords(active_only: bool = False) -> List[Dict]:
+    return _keywords(get_data_version(), active_only)
+
+
+def keyword_page(query: str = "", active: Optional[bool] = None,
+                 limit: int = 20, offset: int = 0) -> List[Dict]:
+    return _keyword_page(get_data_version(), query, active, limit, offset)
+
+
+def keyword_count(query: str = "", active: Optional[bool] = None) -> int:
+    return _keyword_count(get_data_version(), query, active)
+
+
+def latest_ranks() -> List[Dict]:
+    return _latest_ranks(get_data_version())
+
+
+def rank_history(keyword_id: int, days: int = 30) -> List[Dict]:
+    return _rank_history(get_data_version(), keyword_id, days)
+
+
+def rank_history_page(keyword_id: int, days: int = 30, limit: int = 100, offset: int = 0) -> List[Dict]:
+    return _rank_history_page(get_data_version(), keyword_id, days, limit, offset)
+
+
+def rank_history_count(keyword_id: int, days: int = 30) -> int:
+    return _rank_history_count(get_data_version(), keyword_id, days)
+
+
+def all_rank_history(days: int = 30) -> List[Dict]:
+    return _all_rank_history(get_data_version(), days)
+
+
+def settings() -> Dict[str, str]:
+    return _settings(get_data_version())
+
+
+def setting(key: str, default: str = "") -> str:
+    return settings().get(key, default)
+
+
+def alert_logs(limit: int = 50) -> List[Dict]:
+    return _alert_logs(get_data_version(), limit)
@@ -1,37 +1,320 @@
 """SQLite DB 관리 — 스키마 + CRUD"""
+import queue
+import atexit
+import logging
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Iterator, Callable, Any
 
-from config import DB_PATH
+from config import DB_PATH, HISTORY_RAW_MAX_DAYS, HISTORY_HOURLY_MAX_DAYS
+
+logger = logging.getLogger(__name__)
 
 
 def _ensure_dir():
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
-@contextmanager
-def get_conn():
-    """SQLite 커넥션 컨텍스트 매니저"""
+# 롤업 테이블 → 구간 포맷 (checked_at을 구간 시작 시각으로 자름)
+ROLLUP_BUCKETS = {
+    "rank_rollup_hourly": "%Y-%m-%d %H:00:00",
+    "rank_rollup_daily": "%Y-%m-%d 00:00:00",
+}
+
+
+# ── 커넥션 관리 — 스레드별 커넥션 1개 재사용 ──
+
+_local = threading.local()
+_conns_lock = threading.Lock()
+_open_conns = set()   # 열려 있는 모든 스레드의 커넥션 (close_connections용)
+_generation = 0       # close_connections 호출 시 증가 → 스레드별 커넥션 재생성
+
+
+def _open_conn() -> sqlite3.Connection:
+    """새 커넥션 + PRAGMA 설정 (스레드당 1회)"""
     _ensure_dir()
     conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    # 새 DB 파일에만 바로 적용 — 기존 DB는 설정 탭의 전환 버튼(VACUUM 1회)으로 전환
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+class _ConnHolder:
+    """스레드별 커넥션 보관 — 스레드가 끝나 threading.local이 정리되면 커넥션도 닫힌다"""
+
+    def __init__(self):
+        self.conn = _open_conn()
+        self.path = str(DB_PATH)
+        self.generation = _generation
+        self.depth = 0  # get_conn 중첩 깊이 (가장 바깥에서만 commit/rollback)
+        with _conns_lock:
+            _open_conns.add(self.conn)
+
+    def close(self):
+        with _conns_lock:
+            _open_conns.discard(self.conn)
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass  # 인터프리터 종료 중
+
+
+def _get_holder() -> _ConnHolder:
+    holder = getattr(_local, "holder", None)
+    if holder is not None and holder.depth == 0 and (
+        holder.generation != _generation or holder.path != str(DB_PATH)
+    ):
+        holder.close()
+        holder = None
+    if holder is None:
+        holder = _ConnHolder()
+        _local.holder = holder
+    return holder
+
+
+@contextmanager
+def get_conn():
+    """
+    SQLite 커넥션 컨텍스트 매니저.
+
+    스레드마다 설정이 끝난 커넥션 하나를 재사용한다. 가장 바깥 블록이
+    끝날 때 commit, 예외가 나면 rollback한다.
+    """
+    holder = _get_holder()
+    conn = holder.conn
+    holder.depth += 1
     try:
         yield conn
-        conn.commit()
+        if holder.depth == 1:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if holder.depth == 1:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        holder.depth -= 1
+
+
+def close_connections():
+    """모든 스레드의 커넥션 닫기 — DB 파일 교체/삭제 전에 호출 (대기 중인 쓰기는 먼저 반영)"""
+    global _generation
+    flush_writes()
+    _invalidate_settings_cache()
+    with _conns_lock:
+        _generation += 1
+        conns = list(_open_conns)
+        _open_conns.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.__dict__.pop("holder", None)
+
+
+# ── 쓰기 큐 — 단일 writer 스레드 ──
+# 모든 쓰기는 큐로 모아 전용 스레드 하나가 트랜잭션 단위로 묶어 실행한다.
+# 쓰기 락을 잡는 곳이 한 군데라 "database is locked" 대기가 없고, 읽기는 각 스레드가
+# WAL로 직접 한다. 호출자는 Future를 받으며 결과는 COMMIT 이후에 채워진다.
+
+WRITE_BATCH_MAX = 64  # 한 트랜잭션으로 묶을 최대 쓰기 작업 수
+
+
+class _DBWriter:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._lock = threading.Lock()
+        self.stats = {"ops": 0, "transactions": 0, "errors": 0}
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, op: Callable[[sqlite3.Connection], Any], transaction: bool = True,
+               bump: bool = True) -> Future:
+        """
+        op(conn)을 writer 스레드에서 실행 — 결과/예외는 Future로.
+
+        transaction=False면 트랜잭션 밖에서 단독 실행한다 (VACUUM 등).
+        bump=False면 화면에 보이지 않는 기록(API 사용량, 실행 heartbeat 등)이라
+        바뀌어도 data_version을 올리지 않는다.
+        """
+        fut = Future()
+        if threading.current_thread() is self._thread:
+            # 쓰기 작업 안에서 다시 쓰기 — 진행 중인 트랜잭션에서 바로 실행
+            try:
+                fut.set_result(op(_get_holder().conn))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        self._ensure_thread()
+        self._queue.put((op, fut, transaction, bump))
+        return fut
+
+    def flush(self, timeout: Optional[float] = None):
+        """지금까지 넣은 쓰기가 모두 COMMIT될 때까지 대기"""
+        if self._thread is None or threading.current_thread() is self._thread:
+            return
+        self.submit(lambda conn: None).result(timeout)
+
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        pending = None
+        while True:
+            item, pending = pending or self._queue.get(), None
+            if not item[2]:
+                self._execute_alone(item)
+                continue
+            batch = [item]
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if not item[2]:
+                    pending = item  # 앞의 묶음을 COMMIT한 뒤 단독 실행
+                    break
+                batch.append(item)
+            self._execute(batch)
+
+    def _execute_alone(self, item: tuple):
+        """트랜잭션 밖에서 실행할 작업 — 그동안 다른 쓰기는 큐에서 기다린다 (락 대기/실패 없음)"""
+        op, fut = item[:2]
+        try:
+            with get_conn() as conn:
+                conn.commit()
+                value = op(conn)
+        except Exception as e:
+            logger.exception("DB 단독 작업 실패")
+            self.stats["errors"] += 1
+            fut.set_exception(e)
+            return
+        self.stats["ops"] += 1
+        fut.set_result(value)
+
+    def _execute(self, batch: List[tuple]):
+        done = []
+        try:
+            with get_conn() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                dirty = False
+                for op, fut, _, bump in batch:
+                    # 작업별 SAVEPOINT — 하나가 실패해도 같은 묶음의 다른 작업은 반영
+                    conn.execute("SAVEPOINT write_op")
+                    try:
+                        changes = conn.total_changes
+                        done.append((fut, op(conn), None))
+                        conn.execute("RELEASE write_op")
+                        dirty = dirty or (bump and conn.total_changes != changes)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_op")
+                        conn.execute("RELEASE write_op")
+                        done.append((fut, None, e))
+                if dirty:
+                    _bump_data_version(conn)
+        except Exception as e:
+            logger.exception(f"DB 쓰기 트랜잭션 실패 ({len(batch)}건)")
+            self.stats["errors"] += len(batch)
+            for _, fut, _, _ in batch:
+                fut.set_exception(e)
+            return
+
+        self.stats["transactions"] += 1
+        self.stats["ops"] += len(batch)
+        for fut, value, exc in done:
+            if exc is not None:
+                self.stats["errors"] += 1
+                fut.set_exception(exc)
+            else:
+                fut.set_result(value)
+
+
+_writer = _DBWriter()
+atexit.register(_writer.flush, 10)
+
+
+def _bump_data_version(conn: sqlite3.Connection):
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+
+def get_data_version() -> int:
+    """
+    DB 데이터 버전 — 화면 데이터가 바뀐 쓰기가 COMMIT될 때마다 바뀐다 (다른 프로세스의 쓰기 포함).
+
+    API 사용량, 체크 실행 상태/heartbeat 같은 기록(bump=False)은 버전을 올리지 않는다.
+    """
+    with get_conn() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+        return row[0] if row else 0
+
+
+def submit_write(op: Callable[[sqlite3.Connection], Any]) -> Future:
+    """쓰기 작업 op(conn)을 큐에 넣고 Future 반환 (result()는 COMMIT 후 반환)"""
+    return _writer.submit(op)
+
+
+def _write(op: Callable[[sqlite3.Connection], Any], wait: bool = True, bump: bool = True):
+    """
+    wait=True면 COMMIT까지 기다려 결과 반환, False면 Future 반환.
+
+    bump=False: 페이지 데이터 캐시와 무관한 기록 — data_version을 올리지 않는다.
+    """
+    fut = _writer.submit(op, bump=bump)
+    return fut.result() if wait else fut
+
+
+def flush_writes(timeout: Optional[float] = None):
+    """대기 중인 쓰기를 모두 COMMIT할 때까지 대기"""
+    _writer.flush(timeout)
+
+
+def get_writer_stats() -> Dict:
+    return dict(_writer.stats, queued=_writer.queue_size())
+
+
+_schema_lock = threading.Lock()
+_schema_ready = None  # 스키마 준비가 끝난 (DB 경로, 커넥션 세대)
 
 
 def init_db():
-    """DB 스키마 초기화"""
+    """
+    DB 스키마 초기화 — 프로세스에서 DB 파일마다 1회.
+
+    Streamlit은 재실행마다 호출하므로 이미 준비됐으면 바로 돌아간다. 실제 작업은
+    writer 스레드에서 단독 실행해 세션 스레드가 쓰기 락을 잡지 않는다.
+    close_connections(DB 교체/초기화) 뒤에는 세대가 바뀌어 다시 실행된다.
+    """
+    global _schema_ready
+    key = (str(DB_PATH), _generation)
+    if _schema_ready == key:
+        return
+    with _schema_lock:
+        if _schema_ready != key:
+            _writer.submit(_init_schema, transaction=False).result()
+            _schema_ready = key
+
+
+def _init_schema(writer_conn: sqlite3.Connection):
+    """스키마 생성 + 마이그레이션 + 기존 DB 백필 (writer 스레드 — writer_conn과 같은 커넥션)"""
     with get_conn() as conn:
         conn.executescript("""
             CREATE TABLE IF NOT EXISTS keywords (
@@ -72,22 +355,347 @@ def init_db():
                 value TEXT NOT NULL
             );
 
-            CREATE INDEX IF NOT EXISTS idx_rank_history_keyword
-                ON rank_history(keyword_id, checked_at);
-            CREATE INDEX IF NOT EXISTS idx_rank_history_checked
-                ON rank_history(checked_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('settings_version', 0);
+            -- 모든 쓰기 트랜잭션마다 증가 (페이지 데이터 캐시 키). 새 DB 파일은 생성 시각(ms)에서
+            -- 시작해, DB를 초기화해도 이전 파일의 버전과 겹치지 않는다.
+            INSERT OR IGNORE INTO meta (key, value)
+                VALUES ('data_version', CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER));
+
+            -- settings 변경 시 버전 증가 (다른 프로세스의 캐시 무효화용)
+            CREATE TRIGGER IF NOT EXISTS trg_settings_insert AFTER INSERT ON settings
+            BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = 'settings_version';
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_settings_update AFTER UPDATE ON settings
+            BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = 'settings_version';
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_settings_delete AFTER DELETE ON settings
+            BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = 'settings_version';
+            END;
+
+            CREATE TABLE IF NOT EXISTS api_key_usage (
+                client_id TEXT NOT NULL,
+                usage_date TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'ok',
+                updated_at TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+                PRIMARY KEY (client_id, usage_date)
+            );
+
+            CREATE TABLE IF NOT EXISTS check_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                total INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+                heartbeat_at TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+                finished_at TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS check_run_items (
+                run_id INTEGER NOT NULL,
+                keyword_id INTEGER NOT NULL,
+                prev_rank INTEGER,
+                max_pages INTEGER,
+                status TEXT NOT NULL DEFAULT 'pending',
+                rank_history_id INTEGER,
+                PRIMARY KEY (run_id, keyword_id),
+                FOREIGN KEY (run_id) REFERENCES check_runs(id) ON DELETE CASCADE,
+                FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_check_runs_status
+                ON check_runs(status, heartbeat_at);
+
+            CREATE TABLE IF NOT EXISTS keyword_latest (
+                keyword_id INTEGER PRIMARY KEY,
+                history_id INTEGER,
+                rank INTEGER,
+                title TEXT,
+                mall_name TEXT,
+                price INTEGER,
+                link TEXT,
+                product_id TEXT,
+                checked_at TEXT,
+                prev_rank INTEGER,
+                prev_checked_at TEXT,
+                FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE
+            );
+        """)
+        for table in ROLLUP_BUCKETS:
+            conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    keyword_id INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    checks INTEGER NOT NULL DEFAULT 0,
+                    ranked INTEGER NOT NULL DEFAULT 0,
+                    out_count INTEGER NOT NULL DEFAULT 0,
+                    min_rank INTEGER,
+                    max_rank INTEGER,
+                    sum_rank INTEGER NOT NULL DEFAULT 0,
+                    last_rank INTEGER,
+                    last_price INTEGER,
+                    last_checked_at TEXT,
+                    PRIMARY KEY (keyword_id, bucket),
+                    FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE
+                ) WITHOUT ROWID;
+
+                CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(bucket);
+            """)
+        _migrate(conn)
+        changes = conn.total_changes
+        _backfill_keyword_latest(conn)
+        _backfill_rollups(conn)
+        if conn.total_changes != changes:
+            _bump_data_version(conn)
+
+
+# ── 스키마 마이그레이션 ──
+# PRAGMA user_version = 마지막으로 적용된 마이그레이션 번호.
+# 위 CREATE TABLE IF NOT EXISTS 스키마가 버전 0이고, 새 변경은 _MIGRATIONS 끝에 추가한다.
+
+def _m001_epoch_columns(conn: sqlite3.Connection):
+    """정수 epoch 컬럼(checked_ts, sent_ts) + 키워드/기간 조회용 커버링 인덱스"""
+    conn.execute("ALTER TABLE rank_history ADD COLUMN checked_ts INTEGER")
+    conn.execute(
+        "UPDATE rank_history SET checked_ts = CAST(strftime('%s', checked_at, 'utc') AS INTEGER)"
+    )
+    conn.execute("ALTER TABLE alert_logs ADD COLUMN sent_ts INTEGER")
+    conn.execute(
+        "UPDATE alert_logs SET sent_ts = CAST(strftime('%s', sent_at, 'utc') AS INTEGER)"
+    )
+    # TEXT 기준 인덱스 → epoch 기준 커버링 인덱스
+    conn.execute("DROP INDEX IF EXISTS idx_rank_history_keyword")
+    conn.execute("DROP INDEX IF EXISTS idx_rank_history_checked")
+    conn.execute(
+        "CREATE INDEX idx_rank_history_keyword_ts ON rank_history(keyword_id, checked_ts, rank, price)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_rank_history_ts ON rank_history(checked_ts, keyword_id, rank)"
+    )
+    conn.execute("CREATE INDEX idx_alert_logs_sent_ts ON alert_logs(sent_ts)")
+
+
+def _m002_products(conn: sqlite3.Connection):
+    """상품 정보(상품ID/상품명/스토어/링크)를 products로 분리 — rank_history는 product_ref만 저장"""
+    conn.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT NOT NULL DEFAULT '',
+            title TEXT NOT NULL DEFAULT '',
+            mall_name TEXT NOT NULL DEFAULT '',
+            link TEXT NOT NULL DEFAULT '',
+            first_seen_ts INTEGER,
+            last_seen_ts INTEGER,
+            UNIQUE (product_id, title, mall_name, link)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO products (product_id, title, mall_name, link, first_seen_ts, last_seen_ts)
+        SELECT COALESCE(product_id, ''), COALESCE(title, ''), COALESCE(mall_name, ''),
+               COALESCE(link, ''), MIN(checked_ts), MAX(checked_ts)
+        FROM rank_history
+        WHERE COALESCE(product_id, title, mall_name, link) IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+
+    # rank_history 재생성 (문자열 컬럼 제거) — id와 AUTOINCREMENT 시퀀스는 유지
+    seq = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'rank_history'"
+    ).fetchone()
+    conn.execute("""
+        CREATE TABLE rank_history_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keyword_id INTEGER NOT NULL,
+            rank INTEGER,
+            price INTEGER,
+            product_ref INTEGER,
+            checked_at TEXT NOT NULL DEFAULT (datetime('now','localtime')),
+            checked_ts INTEGER,
+            FOREIGN KEY (keyword_id) REFERENCES keywords(id) ON DELETE CASCADE,
+            FOREIGN KEY (product_ref) REFERENCES products(id)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO rank_history_new (id, keyword_id, rank, price, product_ref, checked_at, checked_ts)
+        SELECT rh.id, rh.keyword_id, rh.rank, rh.price, p.id, rh.checked_at, rh.checked_ts
+        FROM rank_history rh
+        LEFT JOIN products p
+               ON p.product_id = COALESCE(rh.product_id, '') AND p.title = COALESCE(rh.title, '')
+              AND p.mall_name = COALESCE(rh.mall_name, '') AND p.link = COALESCE(rh.link, '')
+              AND COALESCE(rh.product_id, rh.title, rh.mall_name, rh.link) IS NOT NULL
+    """)
+    conn.execute("DROP TABLE rank_history")
+    conn.execute("ALTER TABLE rank_history_new RENAME TO rank_history")
+    if seq:
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'rank_history'", (seq[0],)
+        )
+    conn.execute(
+        "CREATE INDEX idx_rank_history_keyword_ts ON rank_history(keyword_id, checked_ts, rank, price)"
+    )
+    conn.execute(
+        "CREATE INDEX idx_rank_history_ts ON rank_history(checked_ts, keyword_id, rank)"
+    )
+
+
+def _m003_keyword_search(conn: sqlite3.Connection):
+    """키워드/매칭 값 부분 검색용 FTS5 trigram 인덱스 + 활성 여부 인덱스"""
+    conn.execute("CREATE INDEX idx_keywords_active ON keywords(is_active, id)")
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE keywords_fts USING fts5(
+                keyword, target_value,
+                content='keywords', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 trigram 사용 불가 — 키워드 검색은 LIKE로 동작: {e}")
+        return
+    conn.execute("""
+        CREATE TRIGGER trg_keywords_fts_insert AFTER INSERT ON keywords BEGIN
+            INSERT INTO keywords_fts(rowid, keyword, target_value)
+            VALUES (new.id, new.keyword, new.target_value);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_keywords_fts_delete AFTER DELETE ON keywords BEGIN
+            INSERT INTO keywords_fts(keywords_fts, rowid, keyword, target_value)
+            VALUES ('delete', old.id, old.keyword, old.target_value);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_keywords_fts_update AFTER UPDATE OF keyword, target_value ON keywords BEGIN
+            INSERT INTO keywords_fts(keywords_fts, rowid, keyword, target_value)
+            VALUES ('delete', old.id, old.keyword, old.target_value);
+            INSERT INTO keywords_fts(rowid, keyword, target_value)
+            VALUES (new.id, new.keyword, new.target_value);
+        END
+    """)
+    conn.execute("INSERT INTO keywords_fts(keywords_fts) VALUES ('rebuild')")
+
+
+def _m004_check_jobs(conn: sqlite3.Connection):
+    """check_runs를 작업 테이블로 — 키워드 집합 키(중복 실행 방지)와 실패 사유"""
+    conn.execute("ALTER TABLE check_runs ADD COLUMN keyset TEXT")
+    conn.execute("ALTER TABLE check_runs ADD COLUMN error TEXT")
+    conn.execute("CREATE INDEX idx_check_runs_keyset ON check_runs(keyset, status)")
+
+
+def _m005_run_item_searched(conn: sqlite3.Connection):
+    """실행 항목별 탐색 상품 수 — 재개/대기한 실행의 결과에도 total_searched를 복원"""
+    conn.execute("ALTER TABLE check_run_items ADD COLUMN total_searched INTEGER")
+
+
+_MIGRATIONS = [
+    _m001_epoch_columns,
+    _m002_products,
+    _m003_keyword_search,
+    _m004_check_jobs,
+    _m005_run_item_searched,
+]
+
+
+def _migrate(conn: sqlite3.Connection):
+    """미적용 마이그레이션을 순서대로 적용 (마이그레이션마다 한 트랜잭션)"""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, migration in enumerate(_MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        conn.commit()
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception("DB 마이그레이션 %d(%s) 실패", version, migration.__name__)
+            raise
+        logger.info("DB 마이그레이션 %d 적용: %s", version, migration.__name__)
+
+
+def _since_ts(days: int) -> int:
+    """현재부터 days일 전의 epoch 초"""
+    return int(time.time()) - days * 86400
+
+
+def _backfill_keyword_latest(conn: sqlite3.Connection):
+    """기존 DB 1회 백필 — keyword_latest가 비어 있고 이력이 있을 때만 실행"""
+    needed = conn.execute(
+        """SELECT NOT EXISTS (SELECT 1 FROM keyword_latest)
+                  AND EXISTS (SELECT 1 FROM rank_history)"""
+    ).fetchone()[0]
+    if not needed:
+        return
+    conn.execute("""
+        WITH ordered AS (
+            SELECT rh.id, rh.keyword_id, rh.rank, rh.price, rh.checked_at,
+                   p.title, p.mall_name, p.link, p.product_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY rh.keyword_id ORDER BY rh.checked_ts DESC, rh.id DESC
+                   ) AS rn
+            FROM rank_history rh
+            LEFT JOIN products p ON p.id = rh.product_ref
+        )
+        INSERT INTO keyword_latest
+            (keyword_id, history_id, rank, title, mall_name, price, link, product_id,
+             checked_at, prev_rank, prev_checked_at)
+        SELECT cur.keyword_id, cur.id, cur.rank, cur.title, cur.mall_name, cur.price,
+               cur.link, cur.product_id, cur.checked_at, prev.rank, prev.checked_at
+        FROM ordered cur
+        LEFT JOIN ordered prev ON prev.keyword_id = cur.keyword_id AND prev.rn = 2
+        WHERE cur.rn = 1
+    """)
+
+
+def _backfill_rollups(conn: sqlite3.Connection):
+    """기존 DB 1회 백필 — 롤업 테이블이 비어 있고 이력이 있을 때만 실행"""
+    for table, fmt in ROLLUP_BUCKETS.items():
+        needed = conn.execute(
+            f"""SELECT NOT EXISTS (SELECT 1 FROM {table})
+                       AND EXISTS (SELECT 1 FROM rank_history)"""
+        ).fetchone()[0]
+        if not needed:
+            continue
+        conn.execute(f"""
+            WITH b AS (
+                SELECT keyword_id, strftime('{fmt}', checked_at) AS bucket,
+                       rank, price, checked_at,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY keyword_id, strftime('{fmt}', checked_at)
+                           ORDER BY checked_at DESC, id DESC
+                       ) AS rn
+                FROM rank_history
+            )
+            INSERT INTO {table}
+                (keyword_id, bucket, checks, ranked, out_count, min_rank, max_rank,
+                 sum_rank, last_rank, last_price, last_checked_at)
+            SELECT keyword_id, bucket, COUNT(*), COUNT(rank), SUM(rank IS NULL),
+                   MIN(rank), MAX(rank), COALESCE(SUM(rank), 0),
+                   MAX(CASE WHEN rn = 1 THEN rank END),
+                   MAX(CASE WHEN rn = 1 THEN price END),
+                   MAX(checked_at)
+            FROM b
+            GROUP BY keyword_id, bucket
         """)
 
 
 # ── Keywords CRUD ──
 
 def add_keyword(keyword: str, target_type: str, target_value: str, sort_type: str = "sim") -> int:
-    with get_conn() as conn:
-        cur = conn.execute(
-            "INSERT INTO keywords (keyword, target_type, target_value, sort_type) VALUES (?, ?, ?, ?)",
-            (keyword, target_type, target_value, sort_type),
-        )
-        return cur.lastrowid
+    return _write(lambda conn: conn.execute(
+        "INSERT INTO keywords (keyword, target_type, target_value, sort_type) VALUES (?, ?, ?, ?)",
+        (keyword, target_type, target_value, sort_type),
+    ).lastrowid)
 
 
 def get_keywords(active_only: bool = False) -> List[Dict]:
@@ -100,6 +708,60 @@ def get_keywords(active_only: bool = False) -> List[Dict]:
         return [dict(r) for r in rows]
 
 
+FTS_MIN_QUERY = 3  # trigram 인덱스는 3글자 이상 검색어에만 쓸 수 있다
+
+
+def _keyword_filter(conn: sqlite3.Connection, query: str = "",
+                    active: Optional[bool] = None) -> Tuple[str, list]:
+    """검색어/활성 여부 → (WHERE 절, 파라미터)"""
+    clauses, params = [], []
+    if active is not None:
+        clauses.append("k.is_active = ?")
+        params.append(1 if active else 0)
+    query = (query or "").strip()
+    if query:
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'keywords_fts'"
+        ).fetchone()
+        if has_fts and len(query) >= FTS_MIN_QUERY:
+            clauses.append("k.id IN (SELECT rowid FROM keywords_fts WHERE keywords_fts MATCH ?)")
+            params.append('"' + query.replace('"', '""') + '"')
+        else:
+            like = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(k.keyword LIKE ? ESCAPE '\\' OR k.target_value LIKE ? ESCAPE '\\')")
+            params += [like, like]
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def search_keywords(query: str = "", active: Optional[bool] = None,
+                    limit: int = 20, offset: int = 0) -> List[Dict]:
+    """
+    키워드 목록 한 페이지 (id 순) + 최신 순위.
+
+    Args:
+        query: 키워드/매칭 값 부분 검색 (3글자 이상은 FTS trigram 인덱스 사용)
+        active: True/False면 활성/비활성만, None이면 전체
+
+    최신 순위 조인은 잘라낸 페이지 행에만 실행된다.
+    """
+    with get_conn() as conn:
+        where, params = _keyword_filter(conn, query, active)
+        rows = conn.execute(
+            f"""SELECT page.*, kl.rank, kl.prev_rank, kl.mall_name, kl.price, kl.checked_at
+                FROM (SELECT k.* FROM keywords k{where} ORDER BY k.id LIMIT ? OFFSET ?) page
+                LEFT JOIN keyword_latest kl ON kl.keyword_id = page.id
+                ORDER BY page.id""",
+            params + [limit, offset],
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def count_keywords(query: str = "", active: Optional[bool] = None) -> int:
+    with get_conn() as conn:
+        where, params = _keyword_filter(conn, query, active)
+        return conn.execute(f"SELECT COUNT(*) FROM keywords k{where}", params).fetchone()[0]
+
+
 def update_keyword(keyword_id: int, **fields):
     allowed = {"keyword", "target_type", "target_value", "sort_type", "is_active"}
     updates = {k: v for k, v in fields.items() if k in allowed}
@@ -108,47 +770,156 @@ def update_keyword(keyword_id: int, **fields):
     updates["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     set_clause = ", ".join(f"{k} = ?" for k in updates)
     values = list(updates.values()) + [keyword_id]
-    with get_conn() as conn:
-        conn.execute(f"UPDATE keywords SET {set_clause} WHERE id = ?", values)
+    _write(lambda conn: conn.execute(f"UPDATE keywords SET {set_clause} WHERE id = ?", values))
 
 
 def delete_keyword(keyword_id: int):
-    with get_conn() as conn:
-        conn.execute("DELETE FROM keywords WHERE id = ?", (keyword_id,))
+    _write(lambda conn: conn.execute("DELETE FROM keywords WHERE id = ?", (keyword_id,)))
+
+
+def delete_keywords(keyword_ids: List[int]):
+    """여러 키워드 일괄 삭제 (한 트랜잭션)"""
+    _write(lambda conn: conn.executemany(
+        "DELETE FROM keywords WHERE id = ?", [(kid,) for kid in keyword_ids],
+    ))
+
+
+def set_keywords_active(keyword_ids: List[int], active: bool):
+    """여러 키워드 활성/비활성 일괄 변경 (한 트랜잭션)"""
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _write(lambda conn: conn.executemany(
+        "UPDATE keywords SET is_active = ?, updated_at = ? WHERE id = ?",
+        [(1 if active else 0, now, kid) for kid in keyword_ids],
+    ))
 
 
 # ── Rank History CRUD ──
 
+_PRODUCT_FIELDS = ("product_id", "title", "mall_name", "link")
+
+
+def _product_refs(conn: sqlite3.Connection, records: List[Dict]) -> List[Optional[int]]:
+    """records의 상품 정보 → products.id 목록 (상품 필드가 모두 None이면 None)"""
+    now = int(time.time())
+    cache = {}
+    refs = []
+    for r in records:
+        values = [r.get(f) for f in _PRODUCT_FIELDS]
+        if all(v is None for v in values):
+            refs.append(None)
+            continue
+        key = tuple(v or "" for v in values)
+        if key not in cache:
+            cache[key] = conn.execute(
+                """INSERT INTO products
+                       (product_id, title, mall_name, link, first_seen_ts, last_seen_ts)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(product_id, title, mall_name, link)
+                   DO UPDATE SET last_seen_ts = excluded.last_seen_ts
+                   RETURNING id""",
+                (*key, now, now),
+            ).fetchone()[0]
+        refs.append(cache[key])
+    return refs
+
+
+def _insert_rank_records(conn: sqlite3.Connection, records: List[Dict]) -> List[int]:
+    """rank_history 일괄 INSERT — 삽입된 id 목록 반환 (records 순서)"""
+    refs = _product_refs(conn, records)
+    conn.executemany(
+        """INSERT INTO rank_history (keyword_id, rank, price, product_ref, checked_at, checked_ts)
+           VALUES (?, ?, ?, ?, datetime('now', 'localtime'), CAST(strftime('%s', 'now') AS INTEGER))""",
+        [(r["keyword_id"], r.get("rank"), r.get("price"), ref) for r, ref in zip(records, refs)],
+    )
+    # 한 트랜잭션 안의 AUTOINCREMENT id는 연속으로 부여된다
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    ids = list(range(last_id - len(records) + 1, last_id + 1))
+
+    # 최신/직전 순위 스냅샷 갱신 — 같은 키워드가 여러 번 있으면 순서대로 반영
+    conn.executemany(
+        """INSERT INTO keyword_latest
+               (keyword_id, history_id, rank, title, mall_name, price, link, product_id, checked_at)
+           SELECT rh.keyword_id, rh.id, rh.rank, p.title, p.mall_name, rh.price,
+                  p.link, p.product_id, rh.checked_at
+           FROM rank_history rh
+           LEFT JOIN products p ON p.id = rh.product_ref
+           WHERE rh.id = ?
+           ON CONFLICT(keyword_id) DO UPDATE SET
+               prev_rank = keyword_latest.rank,
+               prev_checked_at = keyword_latest.checked_at,
+               history_id = excluded.history_id,
+               rank = excluded.rank,
+               title = excluded.title,
+               mall_name = excluded.mall_name,
+               price = excluded.price,
+               link = excluded.link,
+               product_id = excluded.product_id,
+               checked_at = excluded.checked_at""",
+        [(i,) for i in ids],
+    )
+
+    # 시간별/일별 롤업 증분 갱신
+    for table, fmt in ROLLUP_BUCKETS.items():
+        conn.executemany(
+            f"""INSERT INTO {table}
+                   (keyword_id, bucket, checks, ranked, out_count, min_rank, max_rank,
+                    sum_rank, last_rank, last_price, last_checked_at)
+               SELECT keyword_id, strftime('{fmt}', checked_at), 1,
+                      rank IS NOT NULL, rank IS NULL, rank, rank,
+                      COALESCE(rank, 0), rank, price, checked_at
+               FROM rank_history WHERE id = ?
+               ON CONFLICT(keyword_id, bucket) DO UPDATE SET
+                   checks = checks + 1,
+                   ranked = ranked + excluded.ranked,
+                   out_count = out_count + excluded.out_count,
+                   min_rank = CASE WHEN min_rank IS NULL OR excluded.min_rank < min_rank
+                                   THEN COALESCE(excluded.min_rank, min_rank) ELSE min_rank END,
+                   max_rank = CASE WHEN max_rank IS NULL OR excluded.max_rank > max_rank
+                                   THEN COALESCE(excluded.max_rank, max_rank) ELSE max_rank END,
+                   sum_rank = sum_rank + excluded.sum_rank,
+                   last_rank = excluded.last_rank,
+                   last_price = excluded.last_price,
+                   last_checked_at = excluded.last_checked_at""",
+            [(i,) for i in ids],
+        )
+    return ids
+
+
 def add_rank_record(keyword_id: int, rank: Optional[int] = None, title: str = None,
                     mall_name: str = None, price: int = None,
                     link: str = None, product_id: str = None):
-    with get_conn() as conn:
-        conn.execute(
-            """INSERT INTO rank_history
-               (keyword_id, rank, title, mall_name, price, link, product_id)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (keyword_id, rank, title, mall_name, price, link, product_id),
-        )
+    add_rank_records([{
+        "keyword_id": keyword_id, "rank": rank, "title": title, "mall_name": mall_name,
+        "price": price, "link": link, "product_id": product_id,
+    }])
+
+
+def add_rank_records(records: List[Dict], wait: bool = True):
+    """
+    순위 기록 일괄 저장 (한 트랜잭션).
+
+    Args:
+        records: [{keyword_id, rank, title, mall_name, price, link, product_id}, ...]
+        wait: False면 기다리지 않고 Future 반환
+
+    Returns:
+        삽입된 rank_history id 목록 (wait=False면 그 Future)
+    """
+    records = list(records)
+    if not records:
+        return [] if wait else _done_future([])
+    return _write(lambda conn: _insert_rank_records(conn, records), wait)
 
 
 def get_latest_ranks() -> List[Dict]:
-    """각 키워드의 최신 순위 조회"""
+    """각 키워드의 최신 순위 조회 (keyword_latest 스냅샷 조인)"""
     sql = """
         SELECT k.id as keyword_id, k.keyword, k.target_type, k.target_value,
                k.sort_type, k.is_active,
-               rh.rank, rh.title, rh.mall_name, rh.price, rh.link, rh.checked_at,
-               prev.rank as prev_rank
+               kl.rank, kl.title, kl.mall_name, kl.price, kl.link, kl.checked_at,
+               kl.prev_rank
         FROM keywords k
-        LEFT JOIN rank_history rh ON rh.id = (
-            SELECT id FROM rank_history
-            WHERE keyword_id = k.id
-            ORDER BY checked_at DESC LIMIT 1
-        )
-        LEFT JOIN rank_history prev ON prev.id = (
-            SELECT id FROM rank_history
-            WHERE keyword_id = k.id
-            ORDER BY checked_at DESC LIMIT 1 OFFSET 1
-        )
+        LEFT JOIN keyword_latest kl ON kl.keyword_id = k.id
         WHERE k.is_active = 1
         ORDER BY k.id
     """
@@ -157,70 +928,645 @@ def get_latest_ranks() -> List[Dict]:
         return [dict(r) for r in rows]
 
 
-def get_rank_history(keyword_id: int, days: int = 30) -> List[Dict]:
+def _done_future(value) -> Future:
+    fut = Future()
+    fut.set_result(value)
+    return fut
+
+
+def _pick_resolution(days: int, resolution: str) -> str:
+    """'auto'면 조회 기간으로 원본/시간별/일별 선택"""
+    if resolution != "auto":
+        return resolution
+    if days <= HISTORY_RAW_MAX_DAYS:
+        return "raw"
+    if days <= HISTORY_HOURLY_MAX_DAYS:
+        return "hourly"
+    return "daily"
+
+
+# 원본 이력 dict 키 — rank_history rh + products p (LEFT JOIN)
+_HISTORY_COLUMNS = (
+    "rh.id, rh.keyword_id, rh.rank, p.title, p.mall_name, rh.price, "
+    "p.link, p.product_id, rh.checked_at"
+)
+
+
+# 롤업 행 → 원본 이력과 같은 키 + 구간 통계 (rank는 구간 평균 순위)
+_ROLLUP_COLUMNS = """
+    NULL AS id, ru.keyword_id,
+    CASE WHEN ru.ranked > 0 THEN CAST(ROUND(1.0 * ru.sum_rank / ru.ranked) AS INTEGER) END AS rank,
+    NULL AS title, NULL AS mall_name, ru.last_price AS price, NULL AS link, NULL AS product_id,
+    ru.bucket AS checked_at,
+    CASE WHEN ru.ranked > 0 THEN 1.0 * ru.sum_rank / ru.ranked END AS mean_rank,
+    ru.min_rank, ru.max_rank, ru.last_rank, ru.out_count, ru.checks
+"""
+
+
+def _merge_archived(rows: List[Dict], since_ts: int, keyword_id: Optional[int] = None,
+                    keyword_info: Optional[Dict[int, Dict]] = None) -> List[Dict]:
+    """원본 이력에 보관 정책으로 아카이브된 행을 합쳐 시간순 정렬"""
+    from core.retention import read_archived_history  # retention → db_manager 순환 import 방지
+
+    live_ids = {r["id"] for r in rows}
+    merged = list(rows)
+    for r in read_archived_history(since_ts, keyword_id):
+        if r["id"] in live_ids:
+            continue
+        if keyword_info is not None:
+            info = keyword_info.get(r["keyword_id"])
+            if info is None:  # 삭제된 키워드
+                continue
+            r.update(info)
+        merged.append(r)
+    merged.sort(key=lambda r: (r["checked_at"], r["id"]))
+    return merged
+
+
+def get_rank_history(keyword_id: int, days: int = 30, resolution: str = "auto",
+                     include_archived: bool = False) -> List[Dict]:
+    """
+    키워드 1개의 순위 이력.
+
+    Args:
+        resolution: 'raw', 'hourly', 'daily' 또는 'auto'(기간에 따라 선택).
+            롤업이면 rank는 구간 평균, checked_at은 구간 시작 시각이고
+            mean_rank/min_rank/max_rank/last_rank/out_count/checks가 추가된다.
+        include_archived: 원본 조회 시 월별 아카이브로 옮겨진 행도 포함
+            (롤업은 보관 정책 대상이 아니라 항상 전체 기간)
+    """
+    resolution = _pick_resolution(days, resolution)
+    if resolution == "raw":
+        sql = f"""
+            SELECT {_HISTORY_COLUMNS}
+            FROM rank_history rh
+            LEFT JOIN products p ON p.id = rh.product_ref
+            WHERE rh.keyword_id = ? AND rh.checked_ts >= ?
+            ORDER BY rh.checked_ts ASC, rh.id ASC
+        """
+        params = (keyword_id, _since_ts(days))
+    else:
+        sql = f"""
+            SELECT {_ROLLUP_COLUMNS}
+            FROM rank_rollup_{resolution} ru
+            WHERE ru.keyword_id = ?
+              AND ru.bucket >= strftime('{ROLLUP_BUCKETS["rank_rollup_" + resolution]}',
+                                        'now', 'localtime', ?)
+            ORDER BY ru.bucket ASC
+        """
+        params = (keyword_id, f"-{days} days")
+    with get_conn() as conn:
+        rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+    if include_archived and resolution == "raw":
+        rows = _merge_archived(rows, _since_ts(days), keyword_id)
+    return rows
+
+
+def get_rank_history_page(keyword_id: int, days: int = 30,
+                          limit: int = 100, offset: int = 0) -> List[Dict]:
+    """
+    키워드 1개의 원본 이력 한 페이지 (최신순) — 조회 기간과 관계없이 항상 원본.
+
+    상세 이력 표용: 차트는 긴 기간에 롤업을 쓰더라도 표는 상품명/스토어/링크를 보여준다.
+    """
+    sql = f"""
+        SELECT {_HISTORY_COLUMNS}
+        FROM rank_history rh
+        LEFT JOIN products p ON p.id = rh.product_ref
+        WHERE rh.keyword_id = ? AND rh.checked_ts >= ?
+        ORDER BY rh.checked_ts DESC, rh.id DESC
+        LIMIT ? OFFSET ?
+    """
+    with get_conn() as conn:
+        rows = conn.execute(sql, (keyword_id, _since_ts(days), limit, offset)).fetchall()
+        return [dict(r) for r in rows]
+
+
+def count_rank_history(keyword_id: int, days: int = 30) -> int:
+    """키워드 1개의 기간 내 원본 이력 행 수"""
+    with get_conn() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM rank_history WHERE keyword_id = ? AND checked_ts >= ?",
+            (keyword_id, _since_ts(days)),
+        ).fetchone()[0]
+
+
+def get_all_rank_history(days: int = 30, resolution: str = "auto",
+                         include_archived: bool = False) -> List[Dict]:
+    """전체 키워드 순위 이력 (resolution, include_archived는 get_rank_history와 같음)"""
+    resolution = _pick_resolution(days, resolution)
+    if resolution == "raw":
+        sql = f"""
+            SELECT {_HISTORY_COLUMNS}, k.keyword, k.target_value
+            FROM rank_history rh
+            JOIN keywords k ON k.id = rh.keyword_id
+            LEFT JOIN products p ON p.id = rh.product_ref
+            WHERE rh.checked_ts >= ?
+            ORDER BY rh.checked_ts ASC, rh.id ASC
+        """
+        params = (_since_ts(days),)
+    else:
+        sql = f"""
+            SELECT {_ROLLUP_COLUMNS}, k.keyword, k.target_value
+            FROM rank_rollup_{resolution} ru
+            JOIN keywords k ON k.id = ru.keyword_id
+            WHERE ru.bucket >= strftime('{ROLLUP_BUCKETS["rank_rollup_" + resolution]}',
+                                        'now', 'localtime', ?)
+            ORDER BY ru.bucket ASC
+        """
+        params = (f"-{days} days",)
+    with get_conn() as conn:
+        rows = [dict(r) for r in conn.execute(sql, params).fetchall()]
+        if include_archived and resolution == "raw":
+            keyword_info = {
+                r["id"]: {"keyword": r["keyword"], "target_value": r["target_value"]}
+                for r in conn.execute("SELECT id, keyword, target_value FROM keywords")
+            }
+    if include_archived and resolution == "raw":
+        rows = _merge_archived(rows, _since_ts(days), keyword_info=keyword_info)
+    return rows
+
+
+def iter_rank_history(keyword_ids: Optional[List[int]], since_ts: int, until_ts: int,
+                      resolution: str = "raw", chunk_rows: int = 10000) -> Iterator[List[Dict]]:
+    """
+    내보내기용 순위 이력 스트리밍 — chunk_rows개씩 묶어 yield (키워드 id, 시각 순).
+
+    Args:
+        keyword_ids: 대상 키워드 (None이면 전체)
+        since_ts, until_ts: epoch 초 구간 [since_ts, until_ts)
+        resolution: 'raw', 'hourly', 'daily' — 롤업 행 키는 get_rank_history와 같다
+
+    전용 읽기 연결 하나로 커서를 끝까지 읽는다 (WAL이라 체크 쓰기는 막히지 않음).
+    아카이브로 옮겨진 원본 행은 포함하지 않는다.
+    """
+    params: list = []
+    if resolution == "raw":
+        where = "rh.checked_ts >= ? AND rh.checked_ts < ?"
+        params += [since_ts, until_ts]
+        if keyword_ids is not None:
+            where += f" AND rh.keyword_id IN ({','.join('?' * len(keyword_ids))})"
+            params += list(keyword_ids)
+        sql = f"""
+            SELECT {_HISTORY_COLUMNS}, k.keyword, k.target_value
+            FROM rank_history rh
+            JOIN keywords k ON k.id = rh.keyword_id
+            LEFT JOIN products p ON p.id = rh.product_ref
+            WHERE {where}
+            ORDER BY rh.keyword_id, rh.checked_ts, rh.id
+        """
+    else:
+        fmt = ROLLUP_BUCKETS["rank_rollup_" + resolution]
+        where = (f"ru.bucket >= strftime('{fmt}', ?, 'unixepoch', 'localtime') "
+                 f"AND ru.bucket < strftime('%Y-%m-%d %H:%M:%S', ?, 'unixepoch', 'localtime')")
+        params += [since_ts, until_ts]
+        if keyword_ids is not None:
+            where += f" AND ru.keyword_id IN ({','.join('?' * len(keyword_ids))})"
+            params += list(keyword_ids)
+        sql = f"""
+            SELECT {_ROLLUP_COLUMNS}, k.keyword, k.target_value
+            FROM rank_rollup_{resolution} ru
+            JOIN keywords k ON k.id = ru.keyword_id
+            WHERE {where}
+            ORDER BY ru.keyword_id, ru.bucket
+        """
+
+    conn = _open_conn()
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                return
+            yield [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def get_rank_stats(days: int = 14) -> Dict[int, Dict]:
+    """키워드별 최근 순위 통계 — {keyword_id: {checks, ranked, best_rank, worst_rank, last_checked_at}}"""
     sql = """
-        SELECT * FROM rank_history
-        WHERE keyword_id = ?
-          AND checked_at >= datetime('now', 'localtime', ?)
-        ORDER BY checked_at ASC
+        SELECT keyword_id,
+               COUNT(*) AS checks,
+               COUNT(rank) AS ranked,
+               MIN(rank) AS best_rank,
+               MAX(rank) AS worst_rank,
+               datetime(MAX(checked_ts), 'unixepoch', 'localtime') AS last_checked_at
+        FROM rank_history
+        WHERE checked_ts >= ?
+        GROUP BY keyword_id
     """
     with get_conn() as conn:
-        rows = conn.execute(sql, (keyword_id, f"-{days} days")).fetchall()
+        rows = conn.execute(sql, (_since_ts(days),)).fetchall()
+        return {r["keyword_id"]: dict(r) for r in rows}
+
+
+# ── Check Runs (체크포인트) ──
+
+ACTIVE_RUN_STATUSES = ("queued", "running")
+
+
+def create_check_run(source: str, items: List[Dict], keyset: Optional[str] = None,
+                     status: str = "running") -> Tuple[int, bool]:
+    """
+    일괄 체크 실행 기록 생성.
+
+    Args:
+        source: 실행 주체 ('schedule', 'manual')
+        items: [{keyword_id, prev_rank, max_pages}, ...] — prev_rank는 실행 시작 시점 순위
+        keyset: 키워드 집합 키 — 같은 키의 queued/running 실행이 있으면 새로 만들지 않는다
+        status: 'running' (바로 실행) 또는 'queued' (워커 풀 대기)
+
+    Returns:
+        (run_id, 새로 만들었는지) — 이미 진행 중인 실행이 있으면 (그 실행 id, False)
+    """
+    def op(conn):
+        # 조회와 생성이 한 쓰기 트랜잭션 안에서 일어나므로 여러 세션/프로세스가 동시에 눌러도 하나만 생긴다
+        if keyset is not None:
+            row = conn.execute(
+                """SELECT id FROM check_runs WHERE keyset = ? AND status IN (?, ?)
+                   ORDER BY id LIMIT 1""",
+                (keyset, *ACTIVE_RUN_STATUSES),
+            ).fetchone()
+            if row:
+                return row["id"], False
+        run_id = conn.execute(
+            "INSERT INTO check_runs (source, status, total, keyset) VALUES (?, ?, ?, ?)",
+            (source, status, len(items), keyset),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO check_run_items (run_id, keyword_id, prev_rank, max_pages) VALUES (?, ?, ?, ?)",
+            [(run_id, i["keyword_id"], i.get("prev_rank"), i.get("max_pages")) for i in items],
+        )
+        return run_id, True
+
+    return _write(op, bump=False)
+
+
+def start_check_run(run_id: int):
+    """대기(queued) → 실행(running) 전환 + heartbeat 갱신"""
+    _write(lambda conn: conn.execute(
+        """UPDATE check_runs SET status = 'running', heartbeat_at = datetime('now','localtime')
+           WHERE id = ?""",
+        (run_id,),
+    ), bump=False)
+
+
+def touch_check_run(run_id: int):
+    """heartbeat만 갱신 — 결과 저장이 뜸해도 진행 중인 실행이 중단된 것으로 보이지 않게"""
+    _write(lambda conn: conn.execute(
+        """UPDATE check_runs SET heartbeat_at = datetime('now','localtime')
+           WHERE id = ? AND status = 'running'""",
+        (run_id,),
+    ), bump=False)
+
+
+def complete_check_run_items(run_id: int, records: List[Dict], wait: bool = True):
+    """
+    키워드 결과 일괄 저장 + 체크포인트 갱신 (한 트랜잭션).
+
+    Args:
+        records: add_rank_records와 같은 형식 (+ total_searched: 탐색한 상품 수)
+        wait: False면 기다리지 않고 Future 반환
+    """
+    records = list(records)
+    if not records:
+        return None if wait else _done_future(None)
+
+    def op(conn):
+        ids = _insert_rank_records(conn, records)
+        conn.executemany(
+            """UPDATE check_run_items SET status = 'done', rank_history_id = ?, total_searched = ?
+               WHERE run_id = ? AND keyword_id = ? AND status = 'pending'""",
+            [(hid, r.get("total_searched"), run_id, r["keyword_id"]) for hid, r in zip(ids, records)],
+        )
+        conn.execute(
+            """UPDATE check_runs SET
+                   done = (SELECT COUNT(*) FROM check_run_items
+                           WHERE run_id = ? AND status = 'done'),
+                   heartbeat_at = datetime('now','localtime')
+               WHERE id = ?""",
+            (run_id, run_id),
+        )
+
+    return _write(op, wait)
+
+
+def finish_check_run(run_id: int, status: str = "completed", error: Optional[str] = None):
+    """실행 종료 기록 — status는 'completed' 또는 'failed' (error: 실패 사유)"""
+    _write(lambda conn: conn.execute(
+        """UPDATE check_runs SET status = ?, error = ?, finished_at = datetime('now','localtime')
+           WHERE id = ?""",
+        (status, error, run_id),
+    ), bump=False)
+
+
+def claim_stale_check_runs(stale_minutes: int) -> List[Dict]:
+    """
+    중단된 실행 조회 + 재개 권한 확보.
+
+    status가 queued/running인데 heartbeat가 stale_minutes 넘게 멈춘 실행을 찾아
+    heartbeat를 갱신한다 (queued는 워커 풀에 넣은 프로세스가 종료된 경우). 갱신에 성공한 실행만 돌려주므로 여러 프로세스가
+    동시에 호출해도 한 실행은 한 곳에서만 재개된다.
+    """
+    cutoff = f"-{stale_minutes} minutes"
+
+    def op(conn):
+        claimed = []
+        rows = conn.execute(
+            """SELECT * FROM check_runs
+               WHERE status IN (?, ?)
+                 AND heartbeat_at < datetime('now', 'localtime', ?)
+               ORDER BY id""",
+            (*ACTIVE_RUN_STATUSES, cutoff),
+        ).fetchall()
+        for r in rows:
+            updated = conn.execute(
+                """UPDATE check_runs SET heartbeat_at = datetime('now','localtime')
+                   WHERE id = ? AND status IN (?, ?)
+                     AND heartbeat_at < datetime('now', 'localtime', ?)""",
+                (r["id"], *ACTIVE_RUN_STATUSES, cutoff),
+            ).rowcount
+            if updated:
+                claimed.append(dict(r))
+        return claimed
+
+    return _write(op, bump=False)
+
+
+_RUN_COLUMNS = "id, source, status, total, done, started_at, heartbeat_at, finished_at, error"
+
+
+def get_check_run(run_id: int) -> Optional[Dict]:
+    """실행 하나의 상태/진행 수 (진행 표시 폴링용 — 기본키 조회)"""
+    with get_conn() as conn:
+        row = conn.execute(
+            f"SELECT {_RUN_COLUMNS} FROM check_runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def get_active_check_runs() -> List[Dict]:
+    """대기/진행 중인 실행 목록 (idx_check_runs_status 사용)"""
+    with get_conn() as conn:
+        rows = conn.execute(
+            f"SELECT {_RUN_COLUMNS} FROM check_runs WHERE status IN (?, ?) ORDER BY id",
+            ACTIVE_RUN_STATUSES,
+        ).fetchall()
         return [dict(r) for r in rows]
 
 
-def get_all_rank_history(days: int = 30) -> List[Dict]:
+def get_check_run_items(run_id: int) -> List[Dict]:
+    """실행 항목 + 키워드 정보 (삭제된 키워드는 제외)"""
     sql = """
-        SELECT rh.*, k.keyword, k.target_value
-        FROM rank_history rh
-        JOIN keywords k ON k.id = rh.keyword_id
-        WHERE rh.checked_at >= datetime('now', 'localtime', ?)
-        ORDER BY rh.checked_at ASC
+        SELECT ri.*, k.keyword, k.target_type, k.target_value, k.sort_type, k.is_active
+        FROM check_run_items ri
+        JOIN keywords k ON k.id = ri.keyword_id
+        WHERE ri.run_id = ?
+        ORDER BY ri.rowid
     """
     with get_conn() as conn:
-        rows = conn.execute(sql, (f"-{days} days",)).fetchall()
+        rows = conn.execute(sql, (run_id,)).fetchall()
+        return [dict(r) for r in rows]
+
+
+def get_check_run_results(run_id: int) -> List[Dict]:
+    """완료된 실행 항목의 저장된 결과"""
+    sql = """
+        SELECT ri.keyword_id, k.keyword, ri.prev_rank, ri.total_searched,
+               rh.rank, p.title, p.mall_name, rh.price, p.link, p.product_id
+        FROM check_run_items ri
+        JOIN keywords k ON k.id = ri.keyword_id
+        JOIN rank_history rh ON rh.id = ri.rank_history_id
+        LEFT JOIN products p ON p.id = rh.product_ref
+        WHERE ri.run_id = ? AND ri.status = 'done'
+        ORDER BY ri.rowid
+    """
+    with get_conn() as conn:
+        rows = conn.execute(sql, (run_id,)).fetchall()
         return [dict(r) for r in rows]
 
 
 # ── Alert Logs ──
 
 def add_alert_log(keyword_id: int, alert_type: str, message: str):
-    with get_conn() as conn:
-        conn.execute(
-            "INSERT INTO alert_logs (keyword_id, alert_type, message) VALUES (?, ?, ?)",
-            (keyword_id, alert_type, message),
-        )
+    add_alert_logs([{"keyword_id": keyword_id, "alert_type": alert_type, "message": message}])
+
+
+def add_alert_logs(logs: List[Dict]):
+    """알림 로그 일괄 저장 (한 트랜잭션) — [{keyword_id, alert_type, message}, ...]"""
+    logs = list(logs)
+    if not logs:
+        return
+    _write(lambda conn: conn.executemany(
+        """INSERT INTO alert_logs (keyword_id, alert_type, message, sent_at, sent_ts)
+           VALUES (:keyword_id, :alert_type, :message,
+                   datetime('now', 'localtime'), CAST(strftime('%s', 'now') AS INTEGER))""",
+        logs,
+    ))
 
 
 def get_alert_logs(limit: int = 50) -> List[Dict]:
     sql = """
-        SELECT al.*, k.keyword
+        SELECT al.id, al.keyword_id, al.alert_type, al.message, al.sent_at, k.keyword
         FROM alert_logs al
         JOIN keywords k ON k.id = al.keyword_id
-        ORDER BY al.sent_at DESC LIMIT ?
+        ORDER BY al.sent_ts DESC, al.id DESC LIMIT ?
     """
     with get_conn() as conn:
         rows = conn.execute(sql, (limit,)).fetchall()
         return [dict(r) for r in rows]
 
 
-# ── Settings ──
+# ── Retention (보관 정책) ──
 
-def get_setting(key: str, default: str = "") -> str:
+def get_expired_rank_history(before_ts: int, limit: int = 5000) -> List[Dict]:
+    """before_ts 이전 원본 이력 (상품 정보 포함, id 순) — 아카이브 이동용"""
+    sql = f"""
+        SELECT {_HISTORY_COLUMNS}, rh.checked_ts
+        FROM rank_history rh
+        LEFT JOIN products p ON p.id = rh.product_ref
+        WHERE rh.checked_ts < ?
+        ORDER BY rh.checked_ts, rh.id
+        LIMIT ?
+    """
     with get_conn() as conn:
-        row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
-        return row["value"] if row else default
+        rows = conn.execute(sql, (before_ts, limit)).fetchall()
+        return [dict(r) for r in rows]
 
 
-def set_setting(key: str, value: str):
+def get_expired_alert_logs(before_ts: int, limit: int = 5000) -> List[Dict]:
+    """before_ts 이전 알림 로그 (id 순) — 아카이브 이동용"""
+    sql = """
+        SELECT id, keyword_id, alert_type, message, sent_at, sent_ts
+        FROM alert_logs
+        WHERE sent_ts < ?
+        ORDER BY sent_ts, id
+        LIMIT ?
+    """
+    with get_conn() as conn:
+        rows = conn.execute(sql, (before_ts, limit)).fetchall()
+        return [dict(r) for r in rows]
+
+
+def delete_rank_history(ids: List[int]):
+    """원본 이력 삭제 (롤업/최신 순위 스냅샷은 유지)"""
+    _write(lambda conn: conn.executemany("DELETE FROM rank_history WHERE id = ?", [(i,) for i in ids]))
+
+
+def delete_alert_logs(ids: List[int]):
+    _write(lambda conn: conn.executemany("DELETE FROM alert_logs WHERE id = ?", [(i,) for i in ids]))
+
+
+def get_freelist_pages() -> int:
+    """DB 파일 안의 빈 페이지 수"""
     with get_conn() as conn:
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def is_incremental_vacuum() -> bool:
+    """auto_vacuum=INCREMENTAL인지 (새 DB는 처음부터, 기존 DB는 convert_to_incremental_vacuum 이후)"""
+    with get_conn() as conn:
+        # PRAGMA auto_vacuum은 연결이 마지막으로 읽은 헤더 값을 돌려주므로 먼저 DB를 한 번 읽는다
+        conn.execute("PRAGMA freelist_count").fetchone()
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def incremental_vacuum(pages: int) -> int:
+    """
+    빈 페이지를 최대 pages개 파일에서 반환 — 남은 빈 페이지 수 반환.
+
+    writer 스레드에서 단독 실행한다. auto_vacuum이 INCREMENTAL이 아닌 DB는 반환하지 않는다.
+    """
+    def op(conn):
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            # execute()는 1페이지만 처리하고 멈추므로 executescript로 끝까지 실행
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # 줄어든 페이지를 DB 파일에 반영 (PASSIVE — 읽기 중인 연결은 기다리지 않음)
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        return remaining
+
+    return _writer.submit(op, transaction=False).result()
+
+
+def convert_to_incremental_vacuum():
+    """
+    기존 DB를 auto_vacuum=INCREMENTAL로 전환 (전체 VACUUM 1회 — DB 크기에 비례해 오래 걸림).
+
+    설정 탭에서 명시적으로 실행한다. writer 스레드에서 단독 실행하므로 그동안의
+    체크 결과 저장은 실패하지 않고 큐에서 기다린다.
+    """
+    def op(conn):
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        logger.info("auto_vacuum=INCREMENTAL 전환 (전체 VACUUM 1회)")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+    _writer.submit(op, transaction=False).result()
+
+
+# ── Settings (프로세스 내 캐시) ──
+# settings 테이블 전체를 메모리에 두고, meta.settings_version(트리거로 증가)이
+# 바뀌었을 때만 다시 읽는다. 다른 프로세스가 값을 바꿔도 버전으로 감지된다.
+
+_settings_lock = threading.Lock()
+_settings_cache = {"path": None, "version": None, "values": {}}
+
+
+def _invalidate_settings_cache():
+    with _settings_lock:
+        _settings_cache["version"] = None
+
+
+def _settings_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'settings_version'").fetchone()
+    return row[0] if row else 0
+
+
+def _settings_values() -> Dict[str, str]:
+    """최신 설정 dict (내부 공유 객체 — 수정 금지)"""
+    with get_conn() as conn:
+        version = _settings_version(conn)
+        with _settings_lock:
+            if (_settings_cache["version"] == version
+                    and _settings_cache["path"] == str(DB_PATH)):
+                return _settings_cache["values"]
+        rows = conn.execute("SELECT key, value FROM settings").fetchall()
+        values = {r["key"]: r["value"] for r in rows}
+    with _settings_lock:
+        _settings_cache.update(path=str(DB_PATH), version=version, values=values)
+    return values
+
+
+def get_setting(key: str, default: str = "") -> str:
+    return _settings_values().get(key, default)
+
+
+def get_settings_snapshot() -> Dict[str, str]:
+    """설정 전체 스냅샷 (복사본) — 여러 값을 읽을 때 한 번만 조회"""
+    return dict(_settings_values())
+
+
+def set_setting(key: str, value: str):
+    def op(conn):
+        before = _settings_version(conn)
         conn.execute(
             "INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = ?",
             (key, value, value),
         )
+        return before, _settings_version(conn)
+
+    before, after = _write(op)
+
+    # write-through — 캐시가 쓰기 직전 버전과 같을 때만 갱신, 아니면 다음 조회 때 재로드
+    with _settings_lock:
+        if (_settings_cache["version"] == before
+                and _settings_cache["path"] == str(DB_PATH)):
+            values = dict(_settings_cache["values"])
+            values[key] = value
+            _settings_cache.update(version=after, values=values)
+        else:
+            _settings_cache["version"] = None
 
 
 def get_all_settings() -> dict:
+    return get_settings_snapshot()
+
+
+# ── API Key Usage ──
+
+def add_api_key_calls(client_id: str, usage_date: str, calls: int = 1, errors: int = 0,
+                      wait: bool = True):
+    return _write(lambda conn: conn.execute(
+        """INSERT INTO api_key_usage (client_id, usage_date, calls, errors)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT(client_id, usage_date) DO UPDATE SET
+               calls = calls + excluded.calls,
+               errors = errors + excluded.errors,
+               updated_at = datetime('now','localtime')""",
+        (client_id, usage_date, calls, errors),
+    ).rowcount, wait, bump=False)
+
+
+def set_api_key_status(client_id: str, usage_date: str, status: str, wait: bool = True):
+    """키 상태 기록 — 'ok', 'exhausted'(일일 한도 소진), 'auth_error'(인증 실패)"""
+    return _write(lambda conn: conn.execute(
+        """INSERT INTO api_key_usage (client_id, usage_date, status)
+           VALUES (?, ?, ?)
+           ON CONFLICT(client_id, usage_date) DO UPDATE SET
+               status = excluded.status,
+               updated_at = datetime('now','localtime')""",
+        (client_id, usage_date, status),
+    ).rowcount, wait, bump=False)
+
+
+def get_api_key_usage(usage_date: str) -> List[Dict]:
     with get_conn() as conn:
-        rows = conn.execute("SELECT key, value FROM settings").fetchall()
-        return {r["key"]: r["value"] for r in rows}
+        rows = conn.execute(
+            "SELECT * FROM api_key_usage WHERE usage_date = ? ORDER BY client_id",
+            (usage_date,),
+        ).fetchall()
+        return [dict(r) for r in rows]
@@ -0,0 +1,53 @@
+"""다운로드용 임시 파일 — 세션 상태에 보관하고, 세션이 끝나면 파일도 지운다"""
+import os
+import weakref
+from pathlib import Path
+from typing import Optional, Callable, MutableMapping
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class TempDownload:
+    """
+    다운로드할 임시 파일 하나.
+
+    객체가 수거되면(세션 종료로 세션 상태가 정리되거나 교체될 때) 또는
+    프로세스가 끝날 때 파일을 삭제한다.
+    """
+
+    def __init__(self, path: Path, file_name: Optional[str] = None, mime: Optional[str] = None):
+        self.path = Path(path)
+        self.file_name = file_name or self.path.name
+        self.mime = mime
+        self._remove = weakref.finalize(self, _unlink, str(self.path))
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @property
+    def size_mb(self) -> float:
+        return self.path.stat().st_size / (1024 * 1024)
+
+    def reader(self) -> Callable[[], bytes]:
+        """st.download_button(data=...)용 — 클릭했을 때만 파일을 읽는다 (이 객체는 참조하지 않음)"""
+        path = str(self.path)
+        return lambda: Path(path).read_bytes()
+
+    def discard(self):
+        self._remove()
+
+
+def replace(state: MutableMapping, key: str, path: Path,
+            file_name: Optional[str] = None, mime: Optional[str] = None) -> TempDownload:
+    """state[key]의 이전 파일을 지우고 새 파일로 교체"""
+    old = state.pop(key, None)
+    if isinstance(old, TempDownload):
+        old.discard()
+    entry = TempDownload(path, file_name, mime)
+    state[key] = entry
+    return entry
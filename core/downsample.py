@@ -0,0 +1,83 @@
+"""차트 다운샘플링 — Plotly로 넘기기 전에 시리즈별 점 개수를 차트 폭에 맞춰 줄인다"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets — 모양을 가장 잘 유지하는 점 threshold개의 인덱스.
+
+    x는 오름차순 숫자(epoch 등). 첫 점과 마지막 점은 항상 포함된다.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(float)
+    y = y.astype(float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)  # 가운데 threshold-2개 구간 경계
+    picked = np.empty(threshold, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 다음 구간 평균점 (마지막 구간이면 마지막 점)
+        nxt_start, nxt_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if nxt_start >= nxt_end:
+            nxt_start, nxt_end = n - 1, n
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+
+        # 이전 선택점 a, 다음 구간 평균점과 만드는 삼각형 넓이가 가장 큰 점
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """구간별 최소/최대 점만 남긴다 (순위 급변을 놓치지 않음, 첫/마지막 점 포함 최대 threshold개)"""
+    n = len(x)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = np.array_split(np.arange(n), (threshold - 2) // 2)
+    picked = [0, n - 1]
+    for idx in buckets:
+        seg = y[idx]
+        picked.append(idx[int(seg.argmin())])
+        picked.append(idx[int(seg.argmax())])
+    return np.unique(picked)
+
+
+_METHODS = {"lttb": lttb_indices, "minmax": minmax_indices}
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int,
+               group: Optional[str] = None, method: str = "lttb") -> pd.DataFrame:
+    """
+    시리즈별로 최대 max_points개만 남긴 DataFrame (x 기준 정렬).
+
+    Args:
+        x: 시간 컬럼 (datetime 또는 숫자)
+        y: 값 컬럼 (결측 없음)
+        group: 시리즈 구분 컬럼 (None이면 전체가 한 시리즈)
+        method: 'lttb' 또는 'minmax'
+    """
+    pick = _METHODS[method]
+    parts = []
+    for _, part in (df.groupby(group, sort=False) if group else [(None, df)]):
+        part = part.sort_values(x)
+        if len(part) > max_points:
+            xs = part[x].to_numpy()
+            if np.issubdtype(xs.dtype, np.datetime64):
+                xs = xs.astype("datetime64[ns]").astype(np.int64)
+            part = part.iloc[pick(xs, part[y].to_numpy(), max_points)]
+        parts.append(part)
+    return pd.concat(parts) if parts else df
@@ -0,0 +1,131 @@
+"""이력 내보내기 — SQLite에서 묶음 단위로 읽어 CSV / gzip CSV / Parquet 파일로 바로 기록"""
+import csv
+import gzip
+import os
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List
+
+from core.db_manager import iter_rank_history
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 내보내기는 pyarrow가 있을 때만
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 10000  # 한 번에 읽어 기록할 행 수 — 메모리 사용량 상한
+
+# 형식 → (파일 확장자, MIME)
+FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# 해상도별 내보낼 컬럼 (db_manager.iter_rank_history 행 키)
+_RAW_COLUMNS = ["keyword_id", "keyword", "target_value", "checked_at", "rank",
+                "title", "mall_name", "price", "link", "product_id"]
+_ROLLUP_COLUMNS = ["keyword_id", "keyword", "target_value", "checked_at", "rank",
+                   "mean_rank", "min_rank", "max_rank", "last_rank", "checks", "out_count", "price"]
+
+_INT_COLUMNS = {"keyword_id", "rank", "price", "min_rank", "max_rank", "last_rank", "checks", "out_count"}
+
+
+def available_formats() -> List[str]:
+    """이 환경에서 쓸 수 있는 형식 (pyarrow가 없으면 Parquet 제외)"""
+    return [f for f in FORMATS if f != "parquet" or pq is not None]
+
+
+def _columns(resolution: str) -> List[str]:
+    return _RAW_COLUMNS if resolution == "raw" else _ROLLUP_COLUMNS
+
+
+def export_file_name(resolution: str, since: datetime, until: datetime, fmt: str) -> str:
+    """다운로드 파일 이름 — 예: rank_history_hourly_20250101-20260101.csv.gz"""
+    return f"rank_history_{resolution}_{since.strftime('%Y%m%d')}-{until.strftime('%Y%m%d')}{FORMATS[fmt][0]}"
+
+
+def _write_csv(f, chunks, columns: List[str]) -> int:
+    """텍스트 파일 f에 헤더 + 묶음별 행 기록, 기록한 행 수 반환"""
+    writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def _write_parquet(path: str, chunks, columns: List[str]) -> int:
+    """묶음마다 row group 하나 — 전체를 한 번에 메모리에 올리지 않는다"""
+    schema = pa.schema([
+        (c, pa.int64() if c in _INT_COLUMNS else pa.float64() if c == "mean_rank" else pa.string())
+        for c in columns
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for rows in chunks:
+            table = pa.Table.from_pydict({c: [r[c] for r in rows] for c in columns}, schema=schema)
+            writer.write_table(table)
+            count += len(rows)
+    return count
+
+
+def export_history(keyword_ids: Optional[List[int]], since: datetime, until: datetime,
+                   resolution: str = "raw", fmt: str = "csv",
+                   dest_dir: Optional[Path] = None) -> Path:
+    """
+    순위 이력을 파일로 내보내기.
+
+    Args:
+        keyword_ids: 대상 키워드 (None이면 전체)
+        since, until: 기간 [since, until)
+        resolution: 'raw', 'hourly', 'daily'
+        fmt: 'csv', 'csv.gz', 'parquet'
+        dest_dir: 저장 폴더 (None이면 임시 폴더 — 다운로드용)
+
+    Returns:
+        생성된 파일 경로 (이름 뒤에 임의 문자열 — 동시에 같은 구간을 내보내도 겹치지 않음)
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"지원하지 않는 내보내기 형식: {fmt}")
+    ext = FORMATS[fmt][0]
+    dest_dir = Path(dest_dir) if dest_dir else Path(tempfile.gettempdir())
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    prefix = export_file_name(resolution, since, until, fmt)[:-len(ext)] + "_"
+    fd, final = tempfile.mkstemp(prefix=prefix, suffix=ext, dir=str(dest_dir))
+    os.close(fd)
+    fd, tmp = tempfile.mkstemp(prefix=prefix, suffix=ext + ".part", dir=str(dest_dir))
+    os.close(fd)
+    final = Path(final)
+
+    columns = _columns(resolution)
+    chunks = iter_rank_history(keyword_ids, int(since.timestamp()), int(until.timestamp()),
+                               resolution=resolution, chunk_rows=CHUNK_ROWS)
+    try:
+        if fmt == "parquet":
+            count = _write_parquet(str(tmp), chunks, columns)
+        elif fmt == "csv.gz":
+            with gzip.open(tmp, "wt", encoding="utf-8-sig", newline="", compresslevel=6) as f:
+                count = _write_csv(f, chunks, columns)
+        else:
+            with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+                count = _write_csv(f, chunks, columns)
+        os.replace(tmp, final)
+    except BaseException:
+        final.unlink(missing_ok=True)
+        raise
+    finally:
+        chunks.close()
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+
+    logger.info(f"이력 내보내기: {final.name} ({count:,}행, {final.stat().st_size / (1024 * 1024):.2f} MB)")
+    return final
@@ -0,0 +1,139 @@
+"""네이버 API HTTP 세션 풀 — keep-alive 커넥션 재사용, gzip 응답, 연결 통계"""
+import time
+import logging
+import threading
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import HTTP_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_local = threading.local()
+_adapter = None  # type: HTTPAdapter
+_adapter_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,          # 전체 요청 수
+    "new_connections": 0,   # 새로 맺은 TCP+TLS 연결 수
+    "connect_time": 0.0,    # 연결 수립에 쓴 총 시간 (초)
+    "request_time": 0.0,    # 요청 총 소요 시간 (초)
+    "last_connect_ms": 0.0, # 마지막 요청의 연결 시간 (재사용이면 0)
+}
+
+
+def _record_connect(elapsed: float):
+    """커넥션 수립 시간 기록 — 요청을 보낸 스레드에서 호출됨"""
+    _local.connect_time = getattr(_local, "connect_time", 0.0) + elapsed
+    with _stats_lock:
+        _stats["new_connections"] += 1
+        _stats["connect_time"] += elapsed
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()
+        _record_connect(time.perf_counter() - t0)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        t0 = time.perf_counter()
+        super().connect()  # TCP + TLS 핸드셰이크
+        _record_connect(time.perf_counter() - t0)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    """연결 시간을 측정하는 커넥션 풀을 쓰는 어댑터"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _get_adapter() -> HTTPAdapter:
+    """프로세스 공용 어댑터 — urllib3 커넥션 풀은 스레드 안전하므로 모든 세션이 공유"""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = _PooledAdapter(
+                pool_connections=4,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=0,
+            )
+        return _adapter
+
+
+def get_session() -> requests.Session:
+    """스레드별 Session (커넥션 풀은 공유 어댑터에 있음)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = _get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    풀링된 세션으로 GET 요청.
+
+    응답 객체에 connect_time(초) 속성을 붙인다 — 커넥션을 재사용했으면 0.
+    """
+    _local.connect_time = 0.0
+    t0 = time.perf_counter()
+    try:
+        resp = get_session().get(url, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - t0
+        connect_time = _local.connect_time
+        with _stats_lock:
+            _stats["requests"] += 1
+            _stats["request_time"] += elapsed
+            _stats["last_connect_ms"] = connect_time * 1000
+    resp.connect_time = connect_time
+    return resp
+
+
+def get_stats() -> Dict:
+    """요청 수, 커넥션 재사용률, 평균 연결/요청 시간(ms)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    reqs = stats["requests"]
+    new_conns = stats["new_connections"]
+    stats["reuse_ratio"] = max(0.0, 1 - new_conns / reqs) if reqs else 0.0
+    stats["avg_connect_ms"] = stats["connect_time"] / new_conns * 1000 if new_conns else 0.0
+    stats["avg_request_ms"] = stats["request_time"] / reqs * 1000 if reqs else 0.0
+    stats["pool_size"] = HTTP_POOL_SIZE
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0 if isinstance(_stats[key], int) else 0.0
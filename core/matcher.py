@@ -0,0 +1,121 @@
+"""검색 결과 상품 ↔ 타겟 매칭 — 여러 타겟을 한 번의 스캔으로 검사"""
+import re
+from collections import deque
+from typing import List, Dict, Set, Tuple
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+_NORM_KEY = "_normalized"  # 상품 dict에 붙이는 정규화 캐시 키
+
+
+def clean_html(text: str) -> str:
+    """HTML 태그 제거"""
+    return _TAG_RE.sub("", text) if text else ""
+
+
+def normalize_item(item: Dict) -> Tuple[str, str, str]:
+    """
+    상품 필드 정규화 — (태그 제거한 상품명, 소문자 상품명, 소문자 스토어명).
+
+    결과는 상품 dict에 캐시해 같은 상품을 다시 정리하지 않는다.
+    """
+    norm = item.get(_NORM_KEY)
+    if norm is None:
+        title = clean_html(item.get("title") or "")
+        mall = item.get("mallName") or ""
+        norm = (title, title.lower(), mall.lower())
+        item[_NORM_KEY] = norm
+    return norm
+
+
+class AhoCorasick:
+    """다중 패턴 부분 문자열 검색 오토마톤 — 텍스트 1회 스캔으로 포함된 패턴 전체를 찾는다"""
+
+    def __init__(self, patterns: List[str]):
+        self._goto = [{}]   # 상태별 문자 → 다음 상태
+        self._fail = [0]
+        self._out = [set()]  # 상태별 매칭 패턴 id
+
+        for pid, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                state = nxt
+            self._out[state].add(pid)
+
+        # BFS로 실패 링크 구성 (루트 자식의 실패 링크는 루트)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state == 0:
+                    continue
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Set[int]:
+        """text에 포함된 패턴 id 집합"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class TargetMatcher:
+    """
+    배치 내 같은 검색어를 보는 타겟 전체로 한 번 만드는 매처.
+
+    타겟 값은 소문자로 한 번만 바꿔 오토마톤에 넣고, 상품마다 상품명과
+    스토어명을 각각 한 번씩 스캔해 매칭되는 타겟 인덱스를 돌려준다.
+    매칭 규칙은 기존과 같다: mall은 스토어명, title은 태그 제거한 상품명,
+    both는 둘 중 하나에 매칭 값이 포함되면 매칭.
+    """
+
+    def __init__(self, targets: List[Tuple[str, str]]):
+        patterns = {}
+        self._title_targets = {}  # 패턴 id → title/both 타겟 인덱스
+        self._mall_targets = {}   # 패턴 id → mall/both 타겟 인덱스
+        self._always = set()      # 빈 매칭 값 — 항상 매칭
+
+        for idx, (target_type, target_value) in enumerate(targets):
+            value = (target_value or "").lower()
+            if target_type not in ("mall", "title", "both"):
+                continue
+            if not value:
+                self._always.add(idx)
+                continue
+            pid = patterns.setdefault(value, len(patterns))
+            if target_type in ("title", "both"):
+                self._title_targets.setdefault(pid, []).append(idx)
+            if target_type in ("mall", "both"):
+                self._mall_targets.setdefault(pid, []).append(idx)
+
+        self._automaton = AhoCorasick(list(patterns))
+
+    def match(self, item: Dict) -> Set[int]:
+        """상품에 매칭되는 타겟 인덱스 집합"""
+        _, title_lower, mall_lower = normalize_item(item)
+        matched = set(self._always)
+        if self._title_targets:
+            for pid in self._automaton.search(title_lower):
+                matched.update(self._title_targets.get(pid, ()))
+        if self._mall_targets:
+            for pid in self._automaton.search(mall_lower):
+                matched.update(self._mall_targets.get(pid, ()))
+        return matched
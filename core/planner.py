@@ -0,0 +1,168 @@
+"""스케줄 실행 계획 — API 호출 예산 대비 예상 호출 수 산정 + 우선순위 정렬"""
+import logging
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict
+
+from config import (
+    MAX_PAGES, ITEMS_PER_PAGE, EARLY_STOP_PAGES,
+    PROBE_PRIOR_RANK, RATE_LIMIT_PER_SEC,
+)
+from core.db_manager import get_rank_stats
+from core.api_keys import key_pool
+
+logger = logging.getLogger(__name__)
+
+STATS_DAYS = 14       # 페이지 추정에 쓰는 이력 기간 (일)
+BUDGET_MARGIN = 0.9   # 남은 호출 수 중 계획에 쓰는 비율 (다른 세션 사용분 여유)
+
+
+@dataclass
+class PlanItem:
+    keyword: Dict
+    priority: float
+    est_pages: int
+    max_pages: Optional[int] = None  # None이면 기본 탐색 한도
+
+
+@dataclass
+class RunPlan:
+    items: List[PlanItem]                                   # 실행 순서 (우선순위 높은 순)
+    skipped: List[PlanItem] = field(default_factory=list)   # 예산 부족으로 제외
+    groups: int = 0
+    projected_calls: int = 0
+    budget: int = 0
+    tight: bool = False
+
+    @property
+    def projected_seconds(self) -> float:
+        return self.projected_calls / RATE_LIMIT_PER_SEC if RATE_LIMIT_PER_SEC else 0.0
+
+    def keywords(self) -> List[Dict]:
+        """check_all_keywords에 넘길 키워드 목록 (실행 순서, 행별 탐색 한도 포함)"""
+        return [
+            dict(item.keyword, max_pages=item.max_pages) if item.max_pages else item.keyword
+            for item in self.items
+        ]
+
+
+def _page_of(rank: int) -> int:
+    return (rank - 1) // ITEMS_PER_PAGE + 1
+
+
+def _estimate_pages(prior_rank: Optional[int], stats: Optional[Dict]) -> int:
+    """
+    행 1개의 예상 조회 페이지 수.
+
+    최근에 순위권이었으면 직전 순위와 최근 최저 순위 중 깊은 쪽 페이지까지,
+    순위권 밖이거나 이력이 없으면 전체 페이지를 본다고 가정한다.
+    """
+    if prior_rank is None:
+        return MAX_PAGES
+    deepest = max(prior_rank, (stats or {}).get("worst_rank") or prior_rank)
+    pages = _page_of(deepest)
+    if not PROBE_PRIOR_RANK:
+        pages += EARLY_STOP_PAGES
+    return min(MAX_PAGES, pages)
+
+
+def _priority(prior_rank: Optional[int], stats: Optional[Dict], now: datetime) -> float:
+    """
+    우선순위 점수 (높을수록 먼저).
+
+    상위 순위일수록, 최근 순위 변동 폭이 클수록, 마지막 체크가 오래될수록 높다.
+    최근 이력이 없는 키워드(신규 등록 등)는 상위권 키워드와 비슷하게 대우한다.
+    """
+    if not stats:
+        return 5.0
+
+    score = 0.0
+    if prior_rank is not None:
+        if prior_rank <= 10:
+            score += 3
+        elif prior_rank <= ITEMS_PER_PAGE:
+            score += 2
+        else:
+            score += 1
+
+    if stats.get("best_rank") is not None:
+        score += min(2.0, (stats["worst_rank"] - stats["best_rank"]) / 20)
+
+    try:
+        last = datetime.strptime(stats["last_checked_at"], "%Y-%m-%d %H:%M:%S")
+        score += min(2.0, (now - last).total_seconds() / 86400)
+    except (TypeError, ValueError):
+        score += 2.0
+    return round(score, 2)
+
+
+def plan_run(keywords: List[Dict], prior_ranks: Dict[int, Optional[int]],
+             budget: Optional[int] = None) -> RunPlan:
+    """
+    활성 키워드 실행 계획 수립.
+
+    (키워드, 정렬)이 같은 행은 페이지를 공유하므로 그룹 단위로 비용을 센다.
+    예상 호출 수가 예산 안이면 우선순위 순서만 정하고, 넘치면 우선순위가
+    낮은 그룹부터 탐색 페이지를 줄이고 그래도 안 되면 제외한다.
+
+    Args:
+        keywords: 활성 키워드 목록
+        prior_ranks: {keyword_id: 직전 순위}
+        budget: 사용 가능한 호출 수 (기본: API 키 풀의 오늘 남은 호출 수)
+    """
+    if budget is None:
+        budget = int(key_pool.remaining_today() * BUDGET_MARGIN)
+
+    stats = get_rank_stats(STATS_DAYS)
+    now = datetime.now()
+
+    groups = {}
+    for kw in keywords:
+        prior = prior_ranks.get(kw["id"])
+        kw_stats = stats.get(kw["id"])
+        item = PlanItem(
+            keyword=kw,
+            priority=_priority(prior, kw_stats, now),
+            est_pages=_estimate_pages(prior, kw_stats),
+        )
+        groups.setdefault((kw["keyword"], kw.get("sort_type", "sim")), []).append(item)
+
+    ordered = sorted(groups.values(), key=lambda g: max(i.priority for i in g), reverse=True)
+    group_pages = [max(i.est_pages for i in g) for g in ordered]
+    projected = sum(group_pages)
+
+    plan = RunPlan(items=[], groups=len(ordered), budget=budget, tight=projected > budget)
+
+    if not plan.tight:
+        for g in ordered:
+            plan.items.extend(sorted(g, key=lambda i: i.priority, reverse=True))
+        plan.projected_calls = projected
+        return plan
+
+    # 예산 부족 — 우선순위가 낮은 그룹부터 탐색 페이지를 1페이지까지 줄이고,
+    # 모든 그룹이 1페이지여도 넘치면 낮은 그룹부터 제외한다
+    allow = list(group_pages)
+    excess = projected - budget
+    for n in reversed(range(len(ordered))):
+        if excess <= 0:
+            break
+        cut = min(excess, allow[n] - 1)
+        allow[n] -= cut
+        excess -= cut
+    keep = len(ordered)
+    while excess > 0 and keep > 0:
+        keep -= 1
+        excess -= allow[keep]
+
+    for n, g in enumerate(ordered):
+        if n >= keep:
+            plan.skipped.extend(g)
+            continue
+        for item in sorted(g, key=lambda i: i.priority, reverse=True):
+            item.max_pages = allow[n]
+            plan.items.append(item)
+        plan.projected_calls += allow[n]
+
+    if plan.skipped:
+        logger.warning(f"API 호출 예산 부족: {len(plan.skipped)}개 키워드 이번 실행에서 제외")
+    return plan
@@ -1,16 +1,22 @@
 """네이버 쇼핑 API 순위 체크 엔진"""
-import re
 import time
+import asyncio
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, List, Dict
 from dataclasses import dataclass
 
 from config import (
-    NAVER_SHOP_API_URL, NAVER_API_HEADERS,
-    MAX_PAGES, ITEMS_PER_PAGE, RATE_LIMIT_DELAY,
+    NAVER_SHOP_API_URL,
+    MAX_PAGES, ITEMS_PER_PAGE,
     REQUEST_TIMEOUT, MAX_RETRIES, EARLY_STOP_PAGES,
+    MAX_CONCURRENCY, PROBE_PRIOR_RANK,
 )
+from core import serp_cache, http_pool
+from core.matcher import TargetMatcher, normalize_item
+from core.rate_limiter import limiter, backoff_delay, parse_retry_after
+from core.api_keys import key_pool, QUOTA_EXCEEDED_CODE
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +32,22 @@ class RankResult:
     total_searched: int = 0  # 탐색한 총 상품 수
 
 
-def _clean_html(text: str) -> str:
-    """HTML 태그 제거"""
-    return re.sub(r"<[^>]+>", "", text) if text else ""
+def _error_code(resp) -> Optional[str]:
+    """네이버 API 에러 응답의 errorCode"""
+    try:
+        body = resp.json()
+    except ValueError:
+        return None
+    return body.get("errorCode") if isinstance(body, dict) else None
 
 
-def _fetch_page(query: str, start: int, sort: str = "sim") -> Optional[Dict]:
-    """네이버 쇼핑 API 1페이지 호출 (재시도 포함)"""
+def _fetch_page(query: str, start: int, sort: str = "sim", use_cache: bool = True) -> Optional[Dict]:
+    """네이버 쇼핑 API 1페이지 호출 (SERP 캐시 우선, 재시도 포함)"""
+    if use_cache:
+        cached = serp_cache.get(query, start, sort)
+        if cached is not None:
+            return cached
+
     params = {
         "query": query,
         "display": ITEMS_PER_PAGE,
@@ -40,45 +55,152 @@ def _fetch_page(query: str, start: int, sort: str = "sim") -> Optional[Dict]:
         "sort": sort,
     }
     for attempt in range(MAX_RETRIES):
+        cred = key_pool.acquire()
+        if cred is None:
+            logger.error("사용 가능한 API 키 없음 (일일 한도 소진 또는 인증 실패)")
+            return None
+
+        status = None
+        error_code = None
+        retry_after = None
+        limiter.acquire()
         try:
-            resp = requests.get(
+            resp = http_pool.get(
                 NAVER_SHOP_API_URL,
-                headers=NAVER_API_HEADERS,
+                headers=cred.headers,
                 params=params,
                 timeout=REQUEST_TIMEOUT,
             )
-            if resp.status_code == 200:
-                return resp.json()
-            elif resp.status_code == 429:
-                logger.warning(f"Rate limit (429), 2초 대기 후 재시도 ({attempt+1}/{MAX_RETRIES})")
-                time.sleep(2)
-            else:
-                logger.error(f"API 에러 {resp.status_code}: {resp.text[:200]}")
-                time.sleep(1)
+            status = resp.status_code
+            if status == 200:
+                data = resp.json()
+                if use_cache:
+                    serp_cache.put(query, start, sort, data)
+                return data
+            error_code = _error_code(resp)
+            if status == 429 and error_code != QUOTA_EXCEEDED_CODE:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                logger.warning(f"Rate limit (429), 재시도 ({attempt+1}/{MAX_RETRIES})")
+            elif status not in (401, 403, 429):
+                logger.error(f"API 에러 {status}: {resp.text[:200]}")
         except requests.RequestException as e:
             logger.error(f"네트워크 오류: {e}")
-            time.sleep(1)
+        finally:
+            key_pool.report(cred, status, error_code)
+            # 한도 소진 429는 속도 문제가 아니므로 동시성 조정에서 제외
+            limiter.release(None if error_code == QUOTA_EXCEEDED_CODE else status, retry_after)
+
+        # Retry-After 대기는 limiter가 모든 호출자에 적용, 키 문제는 바로 다음 키로 재시도
+        key_error = status in (401, 403) or error_code == QUOTA_EXCEEDED_CODE
+        if not retry_after and not key_error and attempt < MAX_RETRIES - 1:
+            time.sleep(backoff_delay(attempt))
     return None
 
 
-def _match_item(item: dict, target_type: str, target_value: str) -> bool:
-    """상품이 타겟과 매칭되는지 확인"""
-    value_lower = target_value.lower()
-    if target_type == "mall":
-        mall = (item.get("mallName") or "").lower()
-        return value_lower in mall
-    elif target_type == "title":
-        title = _clean_html(item.get("title") or "").lower()
-        return value_lower in title
-    elif target_type == "both":
-        mall = (item.get("mallName") or "").lower()
-        title = _clean_html(item.get("title") or "").lower()
-        return value_lower in mall or value_lower in title
-    return False
+class _RankScan:
+    """타겟 1개의 탐색 상태 — 첫 번째 매칭만 기록"""
+
+    def __init__(self, stop_on_match: bool = False):
+        self.stop_on_match = stop_on_match
+        self.result = RankResult(rank=None)
+        self.found = False
+        self.pages_since_found = 0
+        self.total_searched = 0
+
+    def record(self, rank: int, item: Dict):
+        """매칭된 상품 기록 (첫 매칭만)"""
+        if self.found:
+            return
+        self.found = True
+        title, _, _ = normalize_item(item)
+        self.result = RankResult(
+            rank=rank,
+            title=title,
+            mall_name=item.get("mallName", ""),
+            price=int(item.get("lprice", 0)),
+            link=item.get("link", ""),
+            product_id=item.get("productId", ""),
+        )
+
+    def end_page(self, last_rank: int) -> bool:
+        """페이지 종료 처리. 다음 페이지를 계속 탐색해야 하면 True"""
+        self.total_searched = last_rank
+        if self.found:
+            if self.stop_on_match:
+                # 페이지를 순서대로 반영하므로 첫 매칭이 곧 최종 순위
+                return False
+            self.pages_since_found += 1
+            if self.pages_since_found >= EARLY_STOP_PAGES:
+                return False
+        return True
+
+    def finish(self) -> RankResult:
+        self.result.total_searched = self.total_searched
+        return self.result
+
+
+class _GroupScan:
+    """
+    같은 (키워드, 정렬)을 공유하는 행들의 탐색 상태.
+
+    페이지는 그룹당 한 번만 조회하고, 각 상품을 한 번 순회하면서
+    아직 탐색 중인 모든 타겟에 대해 매칭한다. 결과는 행마다 따로 만든다.
+
+    probe 모드에서는 행의 prior_rank(이전 순위)가 있는 페이지까지를 처음에
+    함께 조회하고, 타겟마다 첫 매칭이 확인되는 즉시 탐색을 끝낸다.
+    """
+
+    def __init__(self, rows: List[Dict], probe: bool = False):
+        self.rows = rows
+        self.probe = probe
+        self.scans = [_RankScan(stop_on_match=probe) for _ in rows]
+        self.matcher = TargetMatcher([(r["target_type"], r["target_value"]) for r in rows])
+        self.limits = [r.get("max_pages") or MAX_PAGES for r in rows]
+        self.active = list(range(len(rows)))
+        self.pages = 0
+
+    @property
+    def max_pages(self) -> int:
+        return max(self.limits)
+
+    @property
+    def prefetch_pages(self) -> int:
+        """처음에 함께 조회할 페이지 수 — 이전 순위가 있던 페이지와 그 앞 페이지들"""
+        if not self.probe:
+            return 1
+        prior_pages = [
+            (r["prior_rank"] - 1) // ITEMS_PER_PAGE + 1
+            for r in self.rows if r.get("prior_rank")
+        ]
+        return min(self.max_pages, max(prior_pages, default=1))
+
+    def feed(self, start: int, items: List[Dict]) -> bool:
+        """페이지 1개 반영. 탐색 중인 타겟이 남아 있으면 True"""
+        self.pages += 1
+        if not items:
+            self.active = []
+            return False
+
+        active = set(self.active)
+        for idx, item in enumerate(items):
+            for i in self.matcher.match(item):
+                if i in active:
+                    self.scans[i].record(start + idx, item)
+
+        last_rank = start + len(items) - 1
+        self.active = [
+            i for i in self.active
+            if self.scans[i].end_page(last_rank) and self.pages < self.limits[i]
+        ]
+        return bool(self.active)
+
+    def results(self) -> List[RankResult]:
+        return [scan.finish() for scan in self.scans]
 
 
 def check_rank(keyword: str, target_type: str, target_value: str,
-               sort: str = "sim", max_pages: int = None) -> RankResult:
+               sort: str = "sim", max_pages: int = None,
+               prior_rank: Optional[int] = None, probe: bool = None) -> RankResult:
     """
     키워드 검색 결과에서 타겟의 순위를 찾는다.
 
@@ -88,17 +210,23 @@ def check_rank(keyword: str, target_type: str, target_value: str,
         target_value: 매칭 값 (스토어명 또는 상품명 키워드)
         sort: 정렬 기준 (sim, date, asc, dsc)
         max_pages: 최대 탐색 페이지 (기본: config 설정)
+        prior_rank: 이전 순위 (probe 모드에서 탐색 범위 결정)
+        probe: 첫 매칭 확인 즉시 중단 (기본: config 설정)
 
     Returns:
         RankResult 객체
     """
     if max_pages is None:
         max_pages = MAX_PAGES
+    if probe is None:
+        probe = PROBE_PRIOR_RANK
 
-    found = False
-    pages_since_found = 0
-    total_searched = 0
-    result = RankResult(rank=None)
+    group = _GroupScan([{
+        "target_type": target_type,
+        "target_value": target_value,
+        "max_pages": max_pages,
+        "prior_rank": prior_rank,
+    }], probe=probe)
 
     for page in range(max_pages):
         start = page * ITEMS_PER_PAGE + 1
@@ -108,75 +236,155 @@ def check_rank(keyword: str, target_type: str, target_value: str,
             logger.warning(f"페이지 {page+1} 데이터 없음, 종료")
             break
 
-        items = data["items"]
-        if not items:
+        if not group.feed(start, data["items"]):
             break
 
-        for idx, item in enumerate(items):
-            rank = start + idx
-            total_searched = rank
-
-            if _match_item(item, target_type, target_value):
-                if not found:
-                    # 첫 번째 매칭만 기록
-                    found = True
-                    result = RankResult(
-                        rank=rank,
-                        title=_clean_html(item.get("title", "")),
-                        mall_name=item.get("mallName", ""),
-                        price=int(item.get("lprice", 0)),
-                        link=item.get("link", ""),
-                        product_id=item.get("productId", ""),
-                    )
-
-        if found:
-            pages_since_found += 1
-            if pages_since_found >= EARLY_STOP_PAGES:
-                break
-
-        # 마지막 페이지가 아니면 rate limit 대기
-        if page < max_pages - 1:
-            time.sleep(RATE_LIMIT_DELAY)
-
-    result.total_searched = total_searched
-    return result
-
-
-def check_all_keywords(keywords: List[Dict], progress_callback=None) -> List[Dict]:
+    return group.results()[0]
+
+
+# ── 비동기 일괄 체크 엔진 ──
+
+def _group_keywords(keywords: List[Dict]) -> Dict[tuple, List[int]]:
+    """(키워드, 정렬)이 같은 행끼리 묶는다 — {(keyword, sort): [입력 인덱스, ...]}"""
+    groups = {}
+    for i, kw in enumerate(keywords):
+        key = (kw["keyword"], kw.get("sort_type", "sim"))
+        groups.setdefault(key, []).append(i)
+    return groups
+
+
+async def _check_group_async(query: str, sort: str, rows: List[Dict], fetch,
+                             probe: bool = False) -> List[RankResult]:
     """
-    전체 키워드 순위 체크.
+    같은 검색어+정렬 그룹을 공유 페이지로 탐색.
+
+    probe 모드의 첫 묶음(이전 순위 페이지까지)은 동시에 조회하고, 이후는
+    한 페이지씩 진행한다. 반영은 항상 페이지 순서대로 한다.
+    """
+    group = _GroupScan(rows, probe=probe)
+    batch = group.prefetch_pages
+    page = 0
+
+    while page < group.max_pages:
+        pages = range(page, min(page + batch, group.max_pages))
+        datas = await asyncio.gather(*(
+            fetch(query, p * ITEMS_PER_PAGE + 1, sort) for p in pages
+        ))
+        for p, data in zip(pages, datas):
+            if not data or "items" not in data:
+                logger.warning(f"[{query}] 페이지 {p+1} 데이터 없음, 종료")
+                return group.results()
+            if not group.feed(p * ITEMS_PER_PAGE + 1, data["items"]):
+                return group.results()
+        page = pages.stop
+        batch = 1
+
+    return group.results()
+
+
+async def check_all_keywords_async(keywords: List[Dict], progress_callback=None,
+                                   max_concurrency: int = None,
+                                   prior_ranks: Optional[Dict[int, Optional[int]]] = None,
+                                   probe: bool = None, result_callback=None) -> List[Dict]:
+    """
+    전체 키워드 순위 체크 (비동기).
+
+    (키워드, 정렬)이 같은 행은 한 그룹으로 묶어 페이지를 한 번만 조회한다.
+    여러 그룹의 _fetch_page 호출을 동시에 진행하고, 호출 속도는
+    _fetch_page 안의 공용 rate limiter가 제한한다.
 
     Args:
         keywords: DB에서 가져온 키워드 목록
-        progress_callback: (current, total, keyword) 콜백
+        progress_callback: (current, total, keyword) 콜백 — 이벤트 루프 스레드에서 호출
+        max_concurrency: 동시 요청 수 (기본: config 설정)
+        prior_ranks: {keyword_id: 이전 순위} — probe 모드의 탐색 시작점
+        probe: 이전 순위 기반 탐색 사용 여부 (기본: config 설정)
+        result_callback: ({keyword_id, keyword, result}) 콜백 — 행 결과가 나올 때마다 호출
 
     Returns:
-        [{keyword_id, keyword, result: RankResult}, ...]
+        [{keyword_id, keyword, result: RankResult}, ...] — 입력 순서 유지
     """
-    results = []
-    total = len(keywords)
+    if max_concurrency is None:
+        max_concurrency = MAX_CONCURRENCY
+    if probe is None:
+        probe = PROBE_PRIOR_RANK
+    if prior_ranks:
+        keywords = [dict(kw, prior_rank=prior_ranks.get(kw["id"])) for kw in keywords]
 
-    for i, kw in enumerate(keywords):
+    total = len(keywords)
+    if total == 0:
         if progress_callback:
-            progress_callback(i, total, kw["keyword"])
+            progress_callback(0, 0, "완료")
+        return []
 
-        result = check_rank(
-            keyword=kw["keyword"],
-            target_type=kw["target_type"],
-            target_value=kw["target_value"],
-            sort=kw.get("sort_type", "sim"),
-        )
-        results.append({
-            "keyword_id": kw["id"],
-            "keyword": kw["keyword"],
-            "result": result,
-        })
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                  thread_name_prefix="rank-fetch")
+
+    async def fetch(query: str, start: int, sort: str) -> Optional[Dict]:
+        async with semaphore:
+            return await loop.run_in_executor(executor, _fetch_page, query, start, sort)
+
+    results = [None] * total
+    done = 0
+
+    async def run_group(query: str, sort: str, indexes: List[int]):
+        nonlocal done
+        rows = [keywords[i] for i in indexes]
+        try:
+            group_results = await _check_group_async(query, sort, rows, fetch, probe=probe)
+        except Exception as e:
+            logger.error(f"[{query}] 순위 체크 실패: {e}")
+            group_results = [RankResult(rank=None) for _ in rows]
+
+        for i, result in zip(indexes, group_results):
+            kw = keywords[i]
+            results[i] = {
+                "keyword_id": kw["id"],
+                "keyword": kw["keyword"],
+                "result": result,
+            }
+            if result_callback:
+                result_callback(results[i])
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, kw["keyword"])
+
+    if progress_callback:
+        progress_callback(0, total, keywords[0]["keyword"])
 
-        # 키워드 간 추가 대기
-        if i < total - 1:
-            time.sleep(0.3)
+    groups = _group_keywords(keywords)
+    try:
+        await asyncio.gather(*(
+            run_group(query, sort, indexes)
+            for (query, sort), indexes in groups.items()
+        ))
+    finally:
+        executor.shutdown(wait=False)
 
     if progress_callback:
         progress_callback(total, total, "완료")
 
     return results
+
+
+def check_all_keywords(keywords: List[Dict], progress_callback=None,
+                       prior_ranks: Optional[Dict[int, Optional[int]]] = None,
+                       result_callback=None) -> List[Dict]:
+    """
+    전체 키워드 순위 체크.
+
+    Args:
+        keywords: DB에서 가져온 키워드 목록
+        progress_callback: (current, total, keyword) 콜백
+        prior_ranks: {keyword_id: 이전 순위} — 있으면 이전 순위 페이지부터 탐색
+        result_callback: ({keyword_id, keyword, result}) 콜백 — 결과가 나올 때마다 호출
+
+    Returns:
+        [{keyword_id, keyword, result: RankResult}, ...]
+    """
+    return asyncio.run(check_all_keywords_async(
+        keywords, progress_callback, prior_ranks=prior_ranks,
+        result_callback=result_callback,
+    ))
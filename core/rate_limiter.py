@@ -0,0 +1,109 @@
+"""적응형 토큰 버킷 rate limiter — 모든 _fetch_page 호출이 공유"""
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from config import (
+    RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST, MAX_CONCURRENCY,
+    RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+)
+
+logger = logging.getLogger(__name__)
+
+AIMD_DECREASE = 0.5  # 429 수신 시 동시 요청 한도 배율
+
+
+class AdaptiveRateLimiter:
+    """
+    토큰 버킷 + AIMD 동시성 제어.
+
+    - 초당 rate개의 토큰이 최대 burst개까지 쌓이고, 요청마다 1개를 쓴다.
+    - 동시 요청 한도는 성공할 때마다 조금씩(가산) 늘고, 429를 받으면 절반으로(승산) 준다.
+    - Retry-After를 받으면 그 시각까지 모든 호출자가 대기한다.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0  # 429 수신 횟수
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """요청 1건 슬롯 확보 (토큰 + 동시성 한도 + Retry-After 대기)"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    wait = None  # release 통지까지 대기
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                self._cond.wait(wait)
+
+    def release(self, status: Optional[int] = None, retry_after: Optional[float] = None):
+        """요청 완료 보고 — 응답 상태로 동시성 한도를 조정"""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if status == 429:
+                self.throttled += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency * AIMD_DECREASE)
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                logger.info(f"429 수신 — 동시 요청 한도 {self.concurrency:.1f}로 축소")
+            elif status is not None and status < 400:
+                # 한도만큼 성공하면 +1 (가산 증가)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self._cond.notify_all()
+
+    def get_state(self) -> dict:
+        with self._cond:
+            return {
+                "rate": self.rate,
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "throttled": self.throttled,
+                "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+            }
+
+
+def backoff_delay(attempt: int) -> float:
+    """지수 백오프 + full jitter (초)"""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP 날짜) → 대기 초"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# 프로세스 공용 limiter — 스케줄러, 일괄 체크, 테스트 검색이 모두 공유
+limiter = AdaptiveRateLimiter(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST, MAX_CONCURRENCY)
@@ -0,0 +1,162 @@
+"""보관 정책 — 오래된 원본 이력/알림 로그를 월별 gzip 아카이브로 옮기고 DB 파일을 줄인다"""
+import os
+import gzip
+import json
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict
+
+from config import ARCHIVE_DIR, RETENTION_DAYS, VACUUM_STEP_PAGES, VACUUM_MAX_STEPS
+from core.db_manager import (
+    get_setting, set_setting,
+    get_expired_rank_history, delete_rank_history,
+    get_expired_alert_logs, delete_alert_logs,
+    incremental_vacuum, is_incremental_vacuum, get_freelist_pages,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 5000        # 한 번에 아카이브로 옮길 행 수 (한 트랜잭션)
+VACUUM_PAUSE = 0.05      # vacuum 단계 사이 대기 (초) — 체크 쓰기에 락 양보
+
+# 아카이브 종류 → (시각 컬럼, 조회 함수, 삭제 함수)
+_KINDS = {
+    "rank_history": ("checked_at", get_expired_rank_history, delete_rank_history),
+    "alert_logs": ("sent_at", get_expired_alert_logs, delete_alert_logs),
+}
+
+
+def get_retention_days() -> int:
+    return int(get_setting("retention_days", str(RETENTION_DAYS)))
+
+
+def _archive_path(kind: str, month: str) -> Path:
+    """월별 아카이브 파일 — 예: archive/rank_history_2025-01.jsonl.gz"""
+    return ARCHIVE_DIR / f"{kind}_{month}.jsonl.gz"
+
+
+def _append_archive(kind: str, month: str, rows: List[Dict]):
+    """월별 아카이브에 gzip 멤버 하나로 추가 후 fsync (DB 삭제 전에 디스크에 남긴다)"""
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(_archive_path(kind, month), "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+            for r in rows:
+                gz.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def _archive_kind(kind: str, before_ts: int) -> int:
+    """before_ts 이전 행을 CHUNK_ROWS씩 아카이브 → DB에서 삭제. 옮긴 행 수 반환"""
+    time_col, fetch, delete = _KINDS[kind]
+    moved = 0
+    while True:
+        rows = fetch(before_ts, CHUNK_ROWS)
+        if not rows:
+            return moved
+        by_month = {}
+        for r in rows:
+            by_month.setdefault(r[time_col][:7], []).append(r)
+        for month, month_rows in by_month.items():
+            _append_archive(kind, month, month_rows)
+        # 아카이브 기록 후 삭제 — 그 사이 중단되면 다음 실행에서 다시 기록되고, 읽을 때 id로 중복 제거
+        delete([r["id"] for r in rows])
+        moved += len(rows)
+
+
+def _vacuum_steps() -> int:
+    """
+    빈 페이지를 VACUUM_STEP_PAGES씩 반환 (최대 VACUUM_MAX_STEPS단계). 남은 빈 페이지 수 반환.
+
+    INCREMENTAL로 전환되지 않은 기존 DB는 건너뛴다 — 전환(전체 VACUUM)은 설정 탭에서 직접 실행.
+    """
+    if not is_incremental_vacuum():
+        return get_freelist_pages()
+    remaining = 0
+    for _ in range(VACUUM_MAX_STEPS):
+        remaining = incremental_vacuum(VACUUM_STEP_PAGES)
+        if remaining == 0:
+            break
+        time.sleep(VACUUM_PAUSE)
+    return remaining
+
+
+def run_retention(days: Optional[int] = None) -> Dict:
+    """
+    보관 정책 실행.
+
+    Args:
+        days: 보관 기간 (None이면 설정값). 0 이하면 아무것도 하지 않는다.
+
+    Returns:
+        {rank_history, alert_logs: 옮긴 행 수, free_pages: 남은 빈 페이지 수}
+    """
+    if days is None:
+        days = get_retention_days()
+    if days <= 0:
+        return {"rank_history": 0, "alert_logs": 0, "free_pages": 0}
+
+    before_ts = int(time.time()) - days * 86400
+    result = {kind: _archive_kind(kind, before_ts) for kind in _KINDS}
+    result["free_pages"] = _vacuum_steps()
+
+    set_setting("last_retention_time", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    logger.info(
+        f"보관 정책 실행: 이력 {result['rank_history']}건, 알림 로그 {result['alert_logs']}건 아카이브 "
+        f"(기준 {days}일), 남은 빈 페이지 {result['free_pages']}"
+    )
+    return result
+
+
+def _read_archive(kind: str, month: str):
+    path = _archive_path(kind, month)
+    if not path.exists():
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def read_archived_history(since_ts: int, keyword_id: Optional[int] = None) -> List[Dict]:
+    """
+    아카이브된 원본 이력 중 since_ts 이후 행 (get_rank_history 원본 행과 같은 키).
+
+    같은 id가 여러 번 기록돼 있으면 한 번만 반환한다.
+    """
+    since_month = datetime.fromtimestamp(since_ts).strftime("%Y-%m")
+    rows, seen = [], set()
+    for month in list_archive_months("rank_history"):
+        if month < since_month:
+            continue
+        for r in _read_archive("rank_history", month):
+            if r["id"] in seen or r["checked_ts"] < since_ts:
+                continue
+            if keyword_id is not None and r["keyword_id"] != keyword_id:
+                continue
+            seen.add(r["id"])
+            r.pop("checked_ts")
+            rows.append(r)
+    return rows
+
+
+def list_archive_months(kind: str) -> List[str]:
+    """아카이브가 있는 월 목록 (오름차순, 'YYYY-MM')"""
+    if not ARCHIVE_DIR.exists():
+        return []
+    prefix = f"{kind}_"
+    return sorted(
+        p.name[len(prefix):-len(".jsonl.gz")]
+        for p in ARCHIVE_DIR.glob(f"{kind}_*.jsonl.gz")
+    )
+
+
+def get_archive_stats() -> Dict:
+    """아카이브 파일 수/크기 — 설정 탭 표시용"""
+    files = list(ARCHIVE_DIR.glob("*.jsonl.gz")) if ARCHIVE_DIR.exists() else []
+    return {
+        "files": len(files),
+        "size_mb": sum(p.stat().st_size for p in files) / (1024 * 1024),
+        "months": list_archive_months("rank_history"),
+    }
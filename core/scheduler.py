@@ -1,15 +1,17 @@
 """APScheduler 기반 자동 순위 체크 스케줄러"""
 import logging
-from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from config import BACKUP_KEEP
 from core.db_manager import (
-    get_keywords, add_rank_record, get_latest_ranks,
+    get_keywords, get_latest_ranks,
     get_setting, set_setting,
 )
-from core.rank_checker import check_all_keywords
-from core.alert_sender import check_and_send_alerts
+from core.planner import plan_run
+from core.batch_runner import run_batch, resume_interrupted_runs
+from core.retention import run_retention
+from core.backup import run_scheduled_backup
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,9 @@ def _run_scheduled_check():
     """스케줄러에서 호출하는 전체 키워드 체크"""
     logger.info("스케줄 순위 체크 시작")
 
+    # 중단된 이전 실행이 있으면 먼저 마저 끝낸다
+    resume_interrupted_runs()
+
     # 이전 순위 수집
     latest = get_latest_ranks()
     prev_ranks = {}
@@ -33,27 +38,31 @@ def _run_scheduled_check():
         logger.info("활성 키워드 없음 — 스킵")
         return
 
-    results = check_all_keywords(keywords)
-
-    # DB 저장
-    for cr in results:
-        result = cr["result"]
-        add_rank_record(
-            keyword_id=cr["keyword_id"],
-            rank=result.rank,
-            title=result.title,
-            mall_name=result.mall_name,
-            price=result.price,
-            link=result.link,
-            product_id=result.product_id,
-        )
-
-    # 알림 체크 + 발송
-    check_and_send_alerts(results, prev_ranks)
-
-    set_setting("last_check_time", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    # 호출 예산 대비 실행 계획 (우선순위 순서, 예산 부족 시 탐색 깊이 축소)
+    plan = plan_run(keywords, prev_ranks)
+    logger.info(
+        f"실행 계획: {len(plan.items)}개 키워드, 예상 호출 {plan.projected_calls}회 "
+        f"/ 예산 {plan.budget}회, 제외 {len(plan.skipped)}개"
+    )
+    if not plan.items:
+        logger.warning("API 호출 예산 없음 — 스킵")
+        return
+
+    # 결과 저장(체크포인트) + 알림 발송 + 마지막 체크 시각 기록
+    results = run_batch(plan.keywords(), "schedule", prior_ranks=prev_ranks)
     logger.info(f"스케줄 순위 체크 완료: {len(results)}건")
 
+    # 오래된 원본 이력 아카이브 — 실패해도 체크 결과에는 영향 없음
+    try:
+        run_retention()
+    except Exception:
+        logger.exception("보관 정책 실행 실패")
+
+    try:
+        run_scheduled_backup(int(get_setting("backup_keep", str(BACKUP_KEEP))))
+    except Exception:
+        logger.exception("정기 백업 실패")
+
 
 def get_scheduler():
     return _scheduler
@@ -0,0 +1,160 @@
+"""SERP 페이지 캐시 — _fetch_page 응답을 압축해 SQLite 사이드카 파일에 저장"""
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Optional, Dict
+
+from config import SERP_CACHE_PATH, SERP_CACHE_TTL, SERP_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+EVICT_EVERY = 50  # 저장 N회마다 만료/용량 정리
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_puts_since_evict = 0
+
+
+def _get_conn() -> sqlite3.Connection:
+    """스레드별 캐시 커넥션 (최초 1회 스키마 생성)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        SERP_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(SERP_CACHE_PATH), timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS serp_pages (
+                query TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                sort TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                PRIMARY KEY (query, start, sort)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS idx_serp_pages_fetched
+                ON serp_pages(fetched_at);
+        """)
+        _local.conn = conn
+    return conn
+
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def get(query: str, start: int, sort: str, ttl: int = None) -> Optional[Dict]:
+    """TTL 이내의 캐시된 페이지 반환 (없거나 만료면 None)"""
+    if ttl is None:
+        ttl = SERP_CACHE_TTL
+    if ttl <= 0:
+        return None
+    try:
+        row = _get_conn().execute(
+            "SELECT body FROM serp_pages WHERE query = ? AND start = ? AND sort = ? AND fetched_at >= ?",
+            (query, start, sort, time.time() - ttl),
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning(f"SERP 캐시 조회 실패: {e}")
+        return None
+
+    if row is None:
+        _count("misses")
+        return None
+    _count("hits")
+    return json.loads(zlib.decompress(row[0]))
+
+
+def put(query: str, start: int, sort: str, data: Dict):
+    """페이지 응답 저장 (zlib 압축)"""
+    global _puts_since_evict
+    if SERP_CACHE_TTL <= 0:
+        return
+    body = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+    try:
+        _get_conn().execute(
+            "INSERT OR REPLACE INTO serp_pages (query, start, sort, fetched_at, size, body) VALUES (?, ?, ?, ?, ?, ?)",
+            (query, start, sort, time.time(), len(body), body),
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"SERP 캐시 저장 실패: {e}")
+        return
+    _count("stores")
+
+    with _stats_lock:
+        _puts_since_evict += 1
+        due = _puts_since_evict >= EVICT_EVERY
+        if due:
+            _puts_since_evict = 0
+    if due:
+        evict()
+
+
+def evict(ttl: int = None, max_mb: float = None) -> int:
+    """만료 항목 삭제 후, 최대 용량을 넘으면 오래된 항목부터 삭제. 삭제 건수 반환"""
+    if ttl is None:
+        ttl = SERP_CACHE_TTL
+    if max_mb is None:
+        max_mb = SERP_CACHE_MAX_MB
+    max_bytes = int(max_mb * 1024 * 1024)
+
+    conn = _get_conn()
+    try:
+        cur = conn.execute("DELETE FROM serp_pages WHERE fetched_at < ?", (time.time() - ttl,))
+        removed = cur.rowcount
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM serp_pages").fetchone()[0]
+        if total > max_bytes:
+            # 오래된 순으로 누적 크기를 세어 초과분만큼 삭제
+            excess = total - max_bytes
+            freed = 0
+            cutoff = None
+            for fetched_at, size in conn.execute(
+                "SELECT fetched_at, size FROM serp_pages ORDER BY fetched_at"
+            ):
+                freed += size
+                cutoff = fetched_at
+                if freed >= excess:
+                    break
+            if cutoff is not None:
+                cur = conn.execute("DELETE FROM serp_pages WHERE fetched_at <= ?", (cutoff,))
+                removed += cur.rowcount
+    except sqlite3.Error as e:
+        logger.warning(f"SERP 캐시 정리 실패: {e}")
+        return 0
+
+    if removed:
+        _count("evictions", removed)
+    return removed
+
+
+def clear():
+    """캐시 전체 삭제"""
+    conn = _get_conn()
+    conn.execute("DELETE FROM serp_pages")
+    conn.execute("VACUUM")
+
+
+def get_stats() -> Dict:
+    """히트/미스 카운터(현재 프로세스 기준) + 캐시 항목 수/크기"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+    try:
+        entries, size = _get_conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM serp_pages"
+        ).fetchone()
+    except sqlite3.Error:
+        entries, size = 0, 0
+    stats["entries"] = entries
+    stats["size_mb"] = size / (1024 * 1024)
+    stats["ttl"] = SERP_CACHE_TTL
+    return stats
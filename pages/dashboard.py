@@ -4,11 +4,15 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-from core.db_manager import get_latest_ranks, get_all_rank_history, get_setting
+from config import (
+    CHART_WIDTH_PX, CHART_DOWNSAMPLE, CHART_TOP_N, CHART_WEBGL_POINTS, CHART_MARKER_POINTS,
+)
+from core import data_cache
+from core.downsample import downsample
 
 
 def render():
-    latest = get_latest_ranks()
+    latest = data_cache.latest_ranks()
 
     if not latest:
         st.info("등록된 키워드가 없습니다. **키워드 관리** 탭에서 키워드를 등록해주세요.")
@@ -31,7 +35,7 @@ def render():
     m3.metric("TOP 10", f"{top10}개")
     m4.metric("순위 상승", f"{improved}개")
 
-    last_check = get_setting("last_check_time", "체크 기록 없음")
+    last_check = data_cache.setting("last_check_time", "체크 기록 없음")
     st.caption(f"최근 체크: {last_check}")
 
     st.divider()
@@ -82,7 +86,7 @@ def render():
     # ── 순위 추이 차트 ──
     st.subheader("순위 추이 (최근 30일)")
 
-    history = get_all_rank_history(days=30)
+    history = data_cache.all_rank_history(days=30)
     if not history:
         st.info("아직 순위 이력 데이터가 없습니다. 순위 체크를 실행해주세요.")
         return
@@ -97,12 +101,40 @@ def render():
     df_hist["checked_at"] = pd.to_datetime(df_hist["checked_at"])
     df_hist["label"] = df_hist["keyword"] + " (" + df_hist["target_value"] + ")"
 
+    # 표시 키워드 — 현재 순위 상위 N개 또는 직접 선택
+    labels = {r["keyword_id"]: f"{r['keyword']} ({r['target_value']})" for r in latest}
+    by_rank = [r["keyword_id"] for r in sorted(latest, key=lambda r: (r["rank"] is None, r["rank"] or 0))]
+    has_history = set(df_hist["keyword_id"])
+    by_rank = [kid for kid in by_rank if kid in has_history]
+    fcol1, fcol2 = st.columns([1, 3])
+    with fcol1:
+        mode = st.radio("표시 키워드", ["상위 N개", "직접 선택"], horizontal=True, key="dash_series_mode")
+    with fcol2:
+        if mode == "상위 N개":
+            # 키워드가 1개 이하면 슬라이더 범위(1~1)를 만들 수 없으므로 그대로 전부 표시
+            top_n = len(by_rank)
+            if top_n > 1:
+                top_n = st.slider("N", min_value=1, max_value=top_n,
+                                  value=min(CHART_TOP_N, top_n), key="dash_top_n")
+            selected = by_rank[:top_n]
+        else:
+            selected = st.multiselect("키워드 선택", options=by_rank, default=by_rank[:CHART_TOP_N],
+                                      format_func=lambda kid: labels.get(kid, str(kid)), key="dash_selected")
+    df_hist = df_hist[df_hist["keyword_id"].isin(selected)]
+    if df_hist.empty:
+        st.info("표시할 키워드를 선택해주세요.")
+        return
+
+    # 시리즈별 다운샘플링 → 점이 많으면 WebGL, 적을 때만 마커
+    raw_points = len(df_hist)
+    df_hist = downsample(df_hist, "checked_at", "rank", CHART_WIDTH_PX, group="label", method=CHART_DOWNSAMPLE)
     fig = px.line(
         df_hist,
         x="checked_at",
         y="rank",
         color="label",
-        markers=True,
+        markers=len(df_hist) <= CHART_MARKER_POINTS,
+        render_mode="webgl" if len(df_hist) > CHART_WEBGL_POINTS else "svg",
         labels={"checked_at": "날짜", "rank": "순위", "label": "키워드"},
     )
     fig.update_yaxes(autorange="reversed", title="순위 (낮을수록 좋음)")
@@ -113,3 +145,5 @@ def render():
         margin=dict(l=40, r=20, t=40, b=40),
     )
     st.plotly_chart(fig, use_container_width=True)
+    if len(df_hist) < raw_points:
+        st.caption(f"{len(selected)}개 키워드 · {raw_points:,}개 점 중 {len(df_hist):,}개 표시 (모양 유지 다운샘플링)")
@@ -1,13 +1,23 @@
 """탭2: 키워드/스토어 등록 관리"""
+import math
+import hashlib
+
 import streamlit as st
 import pandas as pd
 
 from config import SORT_OPTIONS
 from core.db_manager import (
-    get_keywords, add_keyword, update_keyword, delete_keyword,
-    add_rank_record, get_latest_ranks,
+    add_keyword, update_keyword, delete_keyword, delete_keywords, set_keywords_active,
+    get_check_run, get_active_check_runs,
 )
-from core.rank_checker import check_rank, check_all_keywords
+from core import data_cache
+from core.rank_checker import check_rank
+from core.batch_runner import submit_check_job, is_stale_run, request_resume
+
+PAGE_SIZES = [10, 20, 50, 100]   # 활성 키워드 카드 페이지 크기
+INACTIVE_TABLE_ROWS = 500        # 비활성 표에 한 번에 보여줄 최대 행 수
+TYPE_LABELS = {"mall": "스토어", "title": "상품명", "both": "복합"}
+JOB_POLL_SECONDS = 2             # 진행 중인 체크 작업 상태 조회 주기
 
 
 def render():
@@ -42,84 +52,175 @@ def render():
     st.divider()
 
     # ── 등록된 키워드 목록 ──
-    keywords = get_keywords()
-    if not keywords:
+    total = data_cache.keyword_count()
+    if not total:
         st.info("등록된 키워드가 없습니다. 위에서 키워드를 등록해주세요.")
         return
 
-    # 최신 순위 정보 병합
-    latest = {r["keyword_id"]: r for r in get_latest_ranks()}
-
-    st.subheader(f"등록 키워드 ({len(keywords)}개)")
+    st.subheader(f"등록 키워드 ({total}개, 활성 {data_cache.keyword_count(active=True)}개)")
 
-    # 일괄 체크 버튼
+    # 일괄 체크 버튼 — 백그라운드 작업으로 제출, 탭을 닫거나 다시 실행해도 계속 진행
     col_batch1, col_batch2 = st.columns([1, 3])
     with col_batch1:
         if st.button("🔄 전체 순위 체크", use_container_width=True):
-            active_kws = [kw for kw in keywords if kw["is_active"]]
+            active_kws = data_cache.keywords(active_only=True)
             if not active_kws:
                 st.warning("활성 키워드가 없습니다.")
             else:
-                progress = st.progress(0, text="순위 체크 중...")
-
-                def on_progress(current, total, kw_name):
-                    pct = current / total if total > 0 else 1.0
-                    progress.progress(pct, text=f"체크 중: {kw_name} ({current}/{total})")
-
-                results = check_all_keywords(active_kws, progress_callback=on_progress)
-                for cr in results:
-                    r = cr["result"]
-                    add_rank_record(
-                        keyword_id=cr["keyword_id"],
-                        rank=r.rank, title=r.title, mall_name=r.mall_name,
-                        price=r.price, link=r.link, product_id=r.product_id,
-                    )
-                progress.empty()
-                st.success(f"전체 순위 체크 완료: {len(results)}건")
-                st.rerun()
+                prior_ranks = {r["keyword_id"]: r["rank"] for r in data_cache.latest_ranks()}
+                run_id, created = submit_check_job(active_kws, "manual", prior_ranks=prior_ranks)
+                st.session_state["check_job_id"] = run_id
+                if not created:
+                    st.toast(f"같은 키워드의 체크 작업 #{run_id}가 이미 진행 중입니다.")
+    with col_batch2:
+        _render_job_result()
+
+    if get_active_check_runs():
+        _job_progress()
+
+    # ── 검색 ──
+    query = st.text_input("🔎 검색", placeholder="키워드 또는 매칭 값 (3글자 이상이면 색인 검색)",
+                          key="kw_search").strip()
+    if st.session_state.get("kw_search_prev") != query:
+        st.session_state["kw_search_prev"] = query
+        st.session_state["kw_page"] = 1
+
+    # ── 활성 키워드 (페이지 단위 카드) ──
+    active_count = data_cache.keyword_count(query, active=True)
+    if not active_count:
+        st.caption("조건에 맞는 활성 키워드가 없습니다.")
+    else:
+        pcol1, pcol2, pcol3 = st.columns([1, 1, 2])
+        with pcol1:
+            page_size = st.selectbox("페이지당", PAGE_SIZES, index=1, key="kw_page_size")
+        pages = max(1, math.ceil(active_count / page_size))
+        if st.session_state.get("kw_page", 1) > pages:
+            st.session_state["kw_page"] = pages
+        with pcol2:
+            page = st.number_input("페이지", min_value=1, max_value=pages, step=1, key="kw_page")
+        with pcol3:
+            st.caption(f"활성 {active_count}개 중 {(page - 1) * page_size + 1}~"
+                       f"{min(page * page_size, active_count)}번째 (총 {pages}페이지)")
+
+        for kw in data_cache.keyword_page(query, active=True, limit=page_size,
+                                          offset=(page - 1) * page_size):
+            _render_card(kw)
+
+    # ── 비활성 키워드 (간단한 표) ──
+    inactive_count = data_cache.keyword_count(query, active=False)
+    if inactive_count:
+        with st.expander(f"⚪ 비활성 키워드 ({inactive_count}개)", expanded=False):
+            rows = data_cache.keyword_page(query, active=False, limit=INACTIVE_TABLE_ROWS)
+            if inactive_count > len(rows):
+                st.caption(f"앞의 {len(rows)}개만 표시합니다. 검색으로 범위를 좁혀주세요.")
+            table = pd.DataFrame([{
+                "키워드": kw["keyword"],
+                "매칭 기준": TYPE_LABELS[kw["target_type"]],
+                "매칭 값": kw["target_value"],
+                "정렬": SORT_OPTIONS.get(kw["sort_type"], kw["sort_type"]),
+                "마지막 순위": kw["rank"],
+                "마지막 체크": (kw["checked_at"] or "")[:16],
+            } for kw in rows])
+            # 선택은 행 위치로 남으므로 표 내용이 바뀌면 위젯 키를 바꿔 이전 선택을 버린다
+            ids = [kw["id"] for kw in rows]
+            table_key = "kw_inactive_table_" + hashlib.sha1(",".join(map(str, ids)).encode()).hexdigest()[:12]
+            old_key = st.session_state.get("kw_inactive_key")
+            if old_key != table_key:
+                st.session_state.pop(old_key, None)
+                st.session_state["kw_inactive_key"] = table_key
+            event = st.dataframe(table, hide_index=True, use_container_width=True,
+                                 on_select="rerun", selection_mode="multi-row",
+                                 key=table_key)
+            selected = [ids[i] for i in event.selection.rows if i < len(ids)]
+
+            icol1, icol2, _ = st.columns([1, 1, 2])
+            with icol1:
+                if st.button("▶ 선택 활성화", disabled=not selected, use_container_width=True):
+                    set_keywords_active(selected, True)
+                    st.session_state.pop(table_key, None)
+                    st.rerun()
+            with icol2:
+                if st.button("🗑 선택 삭제", disabled=not selected, use_container_width=True):
+                    delete_keywords(selected)
+                    st.session_state.pop(table_key, None)
+                    st.rerun()
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _job_progress():
+    """대기/진행 중인 체크 작업 진행 표시 — 이 부분만 주기적으로 다시 그린다"""
+    runs = get_active_check_runs()
+    if not runs:
+        st.rerun()  # 끝나면 전체를 다시 그려 새 순위를 보여준다
+    for run in runs:
+        if is_stale_run(run):
+            # 프로세스가 죽어 멈춘 실행 — 다음 정기 실행까지 기다리지 않고 바로 재개
+            request_resume()
+            st.progress(run["done"] / run["total"] if run["total"] else 0.0,
+                        text=f"체크 작업 #{run['id']} 중단됨 — 재개 중: {run['done']}/{run['total']}")
+        elif run["status"] == "queued":
+            st.progress(0.0, text=f"체크 작업 #{run['id']} 대기 중 ({run['total']}개 키워드)")
+        else:
+            pct = run["done"] / run["total"] if run["total"] else 1.0
+            st.progress(pct, text=f"체크 작업 #{run['id']} 진행 중: {run['done']}/{run['total']}")
+
+
+def _render_job_result():
+    """이 세션에서 제출한 작업이 끝났으면 결과를 한 번 표시"""
+    run_id = st.session_state.get("check_job_id")
+    if run_id is None:
+        return
+    run = get_check_run(run_id)
+    if run is None or run["status"] in ("queued", "running"):
+        return
+    del st.session_state["check_job_id"]
+    if run["status"] == "failed":
+        st.error(f"체크 작업 #{run_id} 실패 ({run['done']}/{run['total']}건 저장): {run['error']}")
+    else:
+        st.success(f"전체 순위 체크 완료: {run['done']}건")
+
+
+def _render_card(kw: dict):
+    """활성 키워드 한 줄 (search_keywords 행 — 최신 순위 포함)"""
+    kid = kw["id"]
+    rank = kw["rank"]
+    rank_display = f"{rank}위" if rank else "순위권 밖"
+    status = "🟢" if kw["is_active"] else "⚪"
+
+    with st.container(border=True):
+        c1, c2, c3, c4 = st.columns([3, 2, 1, 2])
+        with c1:
+            st.markdown(f"{status} **{kw['keyword']}**")
+            st.caption(f"{TYPE_LABELS[kw['target_type']]}: {kw['target_value']} | "
+                       f"{SORT_OPTIONS.get(kw['sort_type'], kw['sort_type'])}")
+        with c2:
+            st.metric("현재 순위", rank_display)
+        with c3:
+            checked = kw["checked_at"] or "-"
+            if checked != "-":
+                checked = checked[5:16]  # MM-DD HH:MM
+            st.caption(f"체크: {checked}")
 
-    # 키워드 테이블
-    for kw in keywords:
-        kid = kw["id"]
-        lr = latest.get(kid, {})
-        rank = lr.get("rank")
-        rank_display = f"**{rank}위**" if rank else "순위권 밖"
-        status = "🟢" if kw["is_active"] else "⚪"
-        type_label = {"mall": "스토어", "title": "상품명", "both": "복합"}[kw["target_type"]]
-
-        with st.container(border=True):
-            c1, c2, c3, c4 = st.columns([3, 2, 1, 2])
-            with c1:
-                st.markdown(f"{status} **{kw['keyword']}**")
-                st.caption(f"{type_label}: {kw['target_value']} | {SORT_OPTIONS.get(kw['sort_type'], kw['sort_type'])}")
-            with c2:
-                st.metric("현재 순위", rank_display.replace("**", ""))
-            with c3:
-                checked = lr.get("checked_at", "-")
-                if checked and checked != "-":
-                    checked = checked[5:16]  # MM-DD HH:MM
-                st.caption(f"체크: {checked}")
-
-            with c4:
-                bcol1, bcol2, bcol3 = st.columns(3)
-                with bcol1:
-                    if st.button("🔍", key=f"test_{kid}", help="테스트 검색"):
-                        with st.spinner("검색 중..."):
-                            result = check_rank(
-                                kw["keyword"], kw["target_type"],
-                                kw["target_value"], kw["sort_type"],
-                                max_pages=3,
-                            )
-                        if result.rank:
-                            st.success(f"{result.rank}위 | {result.mall_name} | ₩{result.price:,}")
-                        else:
-                            st.warning(f"순위권 밖 (상위 {result.total_searched}개 탐색)")
-                with bcol2:
-                    active_label = "⏸" if kw["is_active"] else "▶"
-                    if st.button(active_label, key=f"toggle_{kid}", help="활성/비활성 토글"):
-                        update_keyword(kid, is_active=0 if kw["is_active"] else 1)
-                        st.rerun()
-                with bcol3:
-                    if st.button("🗑", key=f"del_{kid}", help="삭제"):
-                        delete_keyword(kid)
-                        st.rerun()
+        with c4:
+            bcol1, bcol2, bcol3 = st.columns(3)
+            with bcol1:
+                if st.button("🔍", key=f"test_{kid}", help="테스트 검색"):
+                    with st.spinner("검색 중..."):
+                        result = check_rank(
+                            kw["keyword"], kw["target_type"],
+                            kw["target_value"], kw["sort_type"],
+                            max_pages=3, prior_rank=rank,
+                        )
+                    if result.rank:
+                        st.success(f"{result.rank}위 | {result.mall_name} | ₩{result.price:,}")
+                    else:
+                        st.warning(f"순위권 밖 (상위 {result.total_searched}개 탐색)")
+            with bcol2:
+                active_label = "⏸" if kw["is_active"] else "▶"
+                if st.button(active_label, key=f"toggle_{kid}", help="활성/비활성 토글"):
+                    update_keyword(kid, is_active=0 if kw["is_active"] else 1)
+                    st.rerun()
+            with bcol3:
+                if st.button("🗑", key=f"del_{kid}", help="삭제"):
+                    delete_keyword(kid)
+                    st.rerun()
@@ -1,15 +1,27 @@
-"""탭3: 순위 이력 상세 — 키워드별 차트 + 이력 테이블 + 통계 + CSV 다운로드"""
+"""탭3: 순위 이력 상세 — 키워드별 차트 + 이력 테이블 + 통계 + 내보내기"""
+import math
+from datetime import date, datetime, time, timedelta
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
-from core.db_manager import get_keywords, get_rank_history
+from config import (
+    HISTORY_HOURLY_MAX_DAYS, CHART_WIDTH_PX, CHART_DOWNSAMPLE, CHART_WEBGL_POINTS, CHART_MARKER_POINTS,
+)
+from core import data_cache, downloads
+from core.downsample import downsample
+from core.export import FORMATS, available_formats, export_history, export_file_name
+
+RESOLUTION_LABELS = {"raw": "원본", "hourly": "시간별 롤업", "daily": "일별 롤업"}
+FORMAT_LABELS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet"}
+TABLE_PAGE_SIZES = [50, 100, 200, 500]  # 상세 이력 표 페이지 크기
 
 
 def render():
     st.header("순위 이력")
 
-    keywords = get_keywords()
+    keywords = data_cache.keywords()
     if not keywords:
         st.info("등록된 키워드가 없습니다.")
         return
@@ -25,7 +37,7 @@ def render():
     # 기간 선택
     days = st.select_slider("조회 기간", options=[7, 14, 30, 60, 90], value=30, format_func=lambda x: f"{x}일")
 
-    history = get_rank_history(selected_id, days=days)
+    history = data_cache.rank_history(selected_id, days=days)
 
     if not history:
         st.warning("선택한 기간에 순위 이력이 없습니다.")
@@ -33,30 +45,61 @@ def render():
 
     df = pd.DataFrame(history)
     df["checked_at"] = pd.to_datetime(df["checked_at"])
+    # 긴 기간은 시간별/일별 롤업 — 행 하나가 구간 하나 (rank = 구간 평균)
+    rolled = "checks" in df.columns
 
     # ── 통계 요약 ──
     ranked_df = df[df["rank"].notnull()]
+    if rolled:
+        check_count = int(df["checks"].sum())
+        ranked_checks = check_count - int(df["out_count"].sum())
+        avg_rank = (ranked_df["mean_rank"] * (ranked_df["checks"] - ranked_df["out_count"])).sum() / ranked_checks \
+            if ranked_checks else None
+        best, worst = ranked_df["min_rank"].min(), ranked_df["max_rank"].max()
+    else:
+        check_count = len(df)
+        avg_rank = ranked_df["rank"].mean()
+        best, worst = ranked_df["rank"].min(), ranked_df["rank"].max()
     if not ranked_df.empty:
         s1, s2, s3, s4 = st.columns(4)
-        s1.metric("체크 횟수", f"{len(df)}회")
-        s2.metric("평균 순위", f"{ranked_df['rank'].mean():.1f}위")
-        s3.metric("최고 순위", f"{int(ranked_df['rank'].min())}위")
-        s4.metric("최저 순위", f"{int(ranked_df['rank'].max())}위")
+        s1.metric("체크 횟수", f"{check_count}회")
+        s2.metric("평균 순위", f"{avg_rank:.1f}위")
+        s3.metric("최고 순위", f"{int(best)}위")
+        s4.metric("최저 순위", f"{int(worst)}위")
     else:
-        st.metric("체크 횟수", f"{len(df)}회 (모두 순위권 밖)")
+        st.metric("체크 횟수", f"{check_count}회 (모두 순위권 밖)")
 
     st.divider()
 
     # ── 순위 추이 차트 (Y축 역전) ──
     st.subheader("순위 추이 차트")
+    if rolled:
+        st.caption(f"{'일' if days > HISTORY_HOURLY_MAX_DAYS else '시간'} 단위 평균 순위 (음영: 구간 최고~최저)")
+
+    # 점이 차트 폭보다 많으면 다운샘플링, 그래도 많으면 WebGL
+    out_df = df[df["rank"].isnull()]
+    chart_df = downsample(ranked_df, "checked_at", "rank", CHART_WIDTH_PX, method=CHART_DOWNSAMPLE)
+    n_points = len(chart_df) + len(out_df)
+    Scatter = go.Scattergl if n_points > CHART_WEBGL_POINTS else go.Scatter
 
     fig = go.Figure()
 
-    if not ranked_df.empty:
-        fig.add_trace(go.Scatter(
-            x=ranked_df["checked_at"],
-            y=ranked_df["rank"],
-            mode="lines+markers",
+    if not chart_df.empty:
+        if rolled:
+            # 구간 최고~최저 순위 밴드
+            fig.add_trace(Scatter(
+                x=chart_df["checked_at"], y=chart_df["max_rank"],
+                mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip",
+            ))
+            fig.add_trace(Scatter(
+                x=chart_df["checked_at"], y=chart_df["min_rank"],
+                mode="lines", line=dict(width=0), fill="tonexty",
+                fillcolor="rgba(74,111,165,0.2)", name="최고~최저", hoverinfo="skip",
+            ))
+        fig.add_trace(Scatter(
+            x=chart_df["checked_at"],
+            y=chart_df["rank"],
+            mode="lines+markers" if n_points <= CHART_MARKER_POINTS else "lines",
             name="순위",
             line=dict(color="#1B2A4A", width=2),
             marker=dict(size=8, color="#4A6FA5"),
@@ -68,10 +111,9 @@ def render():
                       annotation_text="TOP 10", annotation_position="right")
 
     # 순위권 밖 표시
-    out_df = df[df["rank"].isnull()]
     if not out_df.empty:
         max_rank = ranked_df["rank"].max() + 50 if not ranked_df.empty else 100
-        fig.add_trace(go.Scatter(
+        fig.add_trace(Scatter(
             x=out_df["checked_at"],
             y=[max_rank] * len(out_df),
             mode="markers",
@@ -89,27 +131,97 @@ def render():
         legend=dict(orientation="h", yanchor="bottom", y=1.02),
     )
     st.plotly_chart(fig, use_container_width=True)
+    if len(chart_df) < len(ranked_df):
+        st.caption(f"{len(ranked_df):,}개 점 중 {len(chart_df):,}개 표시 (모양 유지 다운샘플링)")
 
     st.divider()
 
-    # ── 이력 테이블 ──
+    # ── 이력 테이블 — 차트가 롤업이어도 표는 원본을 페이지 단위로 ──
     st.subheader("상세 이력")
+    _render_detail_table(selected_id, days)
 
-    display_df = df[["checked_at", "rank", "title", "mall_name", "price", "link"]].copy()
+    st.divider()
+    _render_export(kw_options, selected_id, days)
+
+
+def _render_detail_table(keyword_id: int, days: int):
+    """원본 이력 최신순 — 한 페이지씩만 DB에서 읽는다"""
+    total = data_cache.rank_history_count(keyword_id, days=days)
+    if not total:
+        st.caption("선택한 기간의 원본 이력이 없습니다 (보관 정책으로 아카이브되었을 수 있습니다).")
+        return
+
+    # 키워드/기간이 바뀌면 첫 페이지로
+    if st.session_state.get("hist_table_prev") != (keyword_id, days):
+        st.session_state["hist_table_prev"] = (keyword_id, days)
+        st.session_state["hist_page"] = 1
+    pcol1, pcol2, pcol3 = st.columns([1, 1, 2])
+    with pcol1:
+        page_size = st.selectbox("페이지당", TABLE_PAGE_SIZES, index=1, key="hist_page_size")
+    pages = max(1, math.ceil(total / page_size))
+    if st.session_state.get("hist_page", 1) > pages:
+        st.session_state["hist_page"] = pages
+    with pcol2:
+        page = st.number_input("페이지", min_value=1, max_value=pages, step=1, key="hist_page")
+    with pcol3:
+        st.caption(f"{total:,}건 중 {(page - 1) * page_size + 1:,}~{min(page * page_size, total):,}번째 "
+                   f"(총 {pages}페이지)")
+
+    rows = data_cache.rank_history_page(keyword_id, days=days, limit=page_size,
+                                        offset=(page - 1) * page_size)
+    display_df = pd.DataFrame(rows)[["checked_at", "rank", "title", "mall_name", "price", "link"]]
     display_df.columns = ["체크 시각", "순위", "상품명", "스토어", "가격", "링크"]
+    display_df["체크 시각"] = display_df["체크 시각"].str[:16]
     display_df["순위"] = display_df["순위"].apply(lambda x: f"{int(x)}위" if pd.notnull(x) else "순위권 밖")
     display_df["가격"] = display_df["가격"].apply(lambda x: f"₩{int(x):,}" if pd.notnull(x) and x > 0 else "-")
-    display_df["체크 시각"] = display_df["체크 시각"].dt.strftime("%Y-%m-%d %H:%M")
-    display_df = display_df.sort_values("체크 시각", ascending=False)
 
     st.dataframe(display_df, use_container_width=True, hide_index=True)
 
-    # ── CSV 다운로드 ──
-    csv = display_df.to_csv(index=False, encoding="utf-8-sig")
-    kw_name = kw_options[selected_id].split(" (")[0]
-    st.download_button(
-        "📥 CSV 다운로드",
-        data=csv,
-        file_name=f"rank_history_{kw_name}_{days}days.csv",
-        mime="text/csv",
-    )
+
+def _render_export(kw_options: dict, selected_id: int, days: int):
+    """이력 내보내기 — 버튼을 눌렀을 때만 DB에서 묶음 단위로 읽어 파일 생성"""
+    st.subheader("📥 이력 내보내기")
+
+    ecol1, ecol2 = st.columns(2)
+    with ecol1:
+        export_ids = st.multiselect(
+            "대상 키워드 (비우면 전체)",
+            options=list(kw_options.keys()),
+            default=[selected_id],
+            format_func=lambda x: kw_options[x],
+            key="export_keywords",
+        )
+        period = st.date_input(
+            "기간",
+            value=(date.today() - timedelta(days=days), date.today()),
+            key="export_period",
+        )
+    with ecol2:
+        resolution = st.selectbox("해상도", options=list(RESOLUTION_LABELS),
+                                  format_func=RESOLUTION_LABELS.get, key="export_resolution")
+        fmt = st.selectbox("형식", options=available_formats(),
+                           format_func=FORMAT_LABELS.get, key="export_format")
+        if "parquet" not in available_formats():
+            st.caption("Parquet 형식은 pyarrow 패키지가 필요합니다 (pip install pyarrow).")
+
+    if len(period) != 2:
+        st.caption("기간의 시작일과 종료일을 모두 선택해주세요.")
+        return
+    since = datetime.combine(period[0], time.min)
+    until = datetime.combine(period[1] + timedelta(days=1), time.min)  # 종료일 포함
+
+    # 파일은 버튼을 눌렀을 때만 만들고, 다운로드 버튼은 클릭했을 때만 파일을 읽는다
+    if st.button("📦 내보내기 파일 만들기"):
+        with st.spinner("내보내기 파일 생성 중..."):
+            path = export_history(export_ids or None, since, until, resolution=resolution, fmt=fmt)
+        downloads.replace(st.session_state, "export_file", path,
+                          file_name=export_file_name(resolution, since, until, fmt),
+                          mime=FORMATS[fmt][1])
+    export = st.session_state.get("export_file")
+    if export is not None and export.exists():
+        st.download_button(
+            f"📥 다운로드 ({export.size_mb:.2f} MB)",
+            data=export.reader(),
+            file_name=export.file_name,
+            mime=export.mime,
+        )
@@ -1,19 +1,27 @@
 """탭4: 설정 — 스케줄, 알림 조건, Gmail SMTP, DB 관리"""
-import shutil
-from datetime import datetime
-from pathlib import Path
-
 import streamlit as st
 
-from config import DB_PATH
-from core.db_manager import get_setting, set_setting, get_alert_logs
+from config import DB_PATH, BACKUP_KEEP
+from core.db_manager import (
+    set_setting, get_writer_stats,
+    is_incremental_vacuum, get_freelist_pages, convert_to_incremental_vacuum,
+)
+from core import data_cache, downloads
 from core.scheduler import start_scheduler, stop_scheduler, is_running
 from core.alert_sender import send_alert
+from core import serp_cache, http_pool
+from core.rate_limiter import limiter
+from core.api_keys import key_pool
+from core.planner import plan_run
+from core.retention import run_retention, get_retention_days, get_archive_stats
+from core.backup import create_backup, list_backups
 
 
 def render():
     st.header("설정")
 
+    settings = data_cache.settings()
+
     col_left, col_right = st.columns(2)
 
     # ── 스케줄 설정 ──
@@ -23,8 +31,8 @@ def render():
         scheduler_on = is_running()
         st.markdown(f"현재 상태: **{'🟢 실행 중' if scheduler_on else '⚪ 중지'}**")
 
-        hour = int(get_setting("scheduler_hour", "9"))
-        minute = int(get_setting("scheduler_minute", "0"))
+        hour = int(settings.get("scheduler_hour", "9"))
+        minute = int(settings.get("scheduler_minute", "0"))
 
         c1, c2 = st.columns(2)
         with c1:
@@ -45,26 +53,26 @@ def render():
                 st.info("스케줄 중지됨")
                 st.rerun()
 
-        last_check = get_setting("last_check_time", "없음")
+        last_check = settings.get("last_check_time", "없음")
         st.caption(f"마지막 체크: {last_check}")
 
     # ── 알림 조건 ──
     with col_right:
         st.subheader("알림 조건")
 
-        alerts_enabled = get_setting("alerts_enabled", "0") == "1"
+        alerts_enabled = settings.get("alerts_enabled", "0") == "1"
         new_alerts = st.toggle("이메일 알림 활성화", value=alerts_enabled)
 
-        threshold = int(get_setting("alert_threshold", "5"))
+        threshold = int(settings.get("alert_threshold", "5"))
         new_threshold = st.number_input("순위 변동 알림 기준 (N단계 이상)", min_value=1, max_value=50, value=threshold)
 
-        alert_top10 = get_setting("alert_top10", "1") == "1"
+        alert_top10 = settings.get("alert_top10", "1") == "1"
         new_top10 = st.checkbox("TOP 10 진입/이탈 알림", value=alert_top10)
 
-        alert_lost = get_setting("alert_lost", "1") == "1"
+        alert_lost = settings.get("alert_lost", "1") == "1"
         new_lost = st.checkbox("순위 이탈 알림", value=alert_lost)
 
-        alert_new = get_setting("alert_new", "1") == "1"
+        alert_new = settings.get("alert_new", "1") == "1"
         new_new = st.checkbox("신규 진입 알림", value=alert_new)
 
         if st.button("알림 설정 저장", use_container_width=True):
@@ -85,18 +93,18 @@ def render():
     with gcol1:
         gmail_addr = st.text_input(
             "Gmail 주소",
-            value=get_setting("gmail_address", ""),
+            value=settings.get("gmail_address", ""),
             placeholder="your@gmail.com",
         )
         gmail_pw = st.text_input(
             "앱 비밀번호",
-            value=get_setting("gmail_app_password", ""),
+            value=settings.get("gmail_app_password", ""),
             type="password",
         )
     with gcol2:
         recipient = st.text_input(
             "알림 수신 이메일",
-            value=get_setting("alert_recipient", ""),
+            value=settings.get("alert_recipient", ""),
             placeholder="recipient@example.com",
         )
 
@@ -131,7 +139,7 @@ def render():
 
     # ── 알림 로그 ──
     st.subheader("최근 알림 로그")
-    logs = get_alert_logs(limit=20)
+    logs = data_cache.alert_logs(limit=20)
     if logs:
         for log in logs:
             st.text(f"[{log['sent_at']}] {log.get('keyword','')} — {log['alert_type']}: {log['message']}")
@@ -140,6 +148,95 @@ def render():
 
     st.divider()
 
+    # ── API 키 사용량 ──
+    st.subheader("API 키 사용량 (오늘)")
+    key_usage = key_pool.get_usage()
+    if key_usage:
+        status_labels = {"ok": "🟢 정상", "exhausted": "🟠 한도 소진", "auth_error": "🔴 인증 실패"}
+        st.dataframe(
+            [{
+                "Client ID": u["client_id"],
+                "호출 수": f"{u['calls']:,}",
+                "일일 한도": f"{u['quota']:,}",
+                "남은 호출": f"{u['remaining']:,}",
+                "상태": status_labels.get(u["status"], u["status"]),
+            } for u in key_usage],
+            use_container_width=True,
+            hide_index=True,
+        )
+    else:
+        st.caption("등록된 API 키가 없습니다. NAVER_CLIENT_ID/NAVER_CLIENT_SECRET 또는 NAVER_API_KEYS를 설정해주세요.")
+
+    with st.expander("🧮 다음 스케줄 실행 계획 미리보기 (dry-run)"):
+        if st.button("실행 계획 계산", use_container_width=True):
+            active_kws = data_cache.keywords(active_only=True)
+            prior_ranks = {r["keyword_id"]: r["rank"] for r in data_cache.latest_ranks()}
+            plan = plan_run(active_kws, prior_ranks)
+
+            p1, p2, p3, p4 = st.columns(4)
+            p1.metric("체크 키워드", f"{len(plan.items)}개")
+            p2.metric("예상 호출", f"{plan.projected_calls:,}회")
+            p3.metric("호출 예산", f"{plan.budget:,}회")
+            p4.metric("예상 소요", f"{plan.projected_seconds / 60:.1f}분")
+            st.caption(f"검색어 그룹 {plan.groups}개 (같은 검색어·정렬은 페이지 공유)")
+
+            if plan.tight:
+                st.warning(f"예산 부족 — 우선순위 낮은 키워드의 탐색 페이지를 줄였고, {len(plan.skipped)}개는 제외됩니다.")
+            if plan.items or plan.skipped:
+                st.dataframe(
+                    [{
+                        "키워드": i.keyword["keyword"],
+                        "타겟": i.keyword["target_value"],
+                        "우선순위": i.priority,
+                        "예상 페이지": i.est_pages,
+                        "탐색 한도": i.max_pages or "기본",
+                        "실행": run_label,
+                    } for items, run_label in ((plan.items, "실행"), (plan.skipped, "제외"))
+                      for i in items],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
+    st.divider()
+
+    # ── SERP 캐시 ──
+    st.subheader("검색 결과 캐시")
+    st.caption("같은 검색어·정렬·페이지는 유효 시간 동안 API를 다시 호출하지 않고 캐시에서 읽습니다.")
+
+    cache_stats = serp_cache.get_stats()
+    cc1, cc2, cc3, cc4 = st.columns(4)
+    cc1.metric("캐시 히트", f"{cache_stats['hits']:,}")
+    cc2.metric("캐시 미스", f"{cache_stats['misses']:,}")
+    cc3.metric("히트율", f"{cache_stats['hit_ratio']:.0%}")
+    cc4.metric("저장 페이지", f"{cache_stats['entries']:,}")
+    st.caption(f"캐시 크기: {cache_stats['size_mb']:.2f} MB | 유효 시간: {cache_stats['ttl']}초")
+
+    if st.button("🧹 캐시 비우기"):
+        serp_cache.clear()
+        st.success("캐시 삭제 완료")
+        st.rerun()
+
+    http_stats = http_pool.get_stats()
+    st.caption(
+        f"API 연결: 요청 {http_stats['requests']:,}회 | "
+        f"커넥션 재사용률 {http_stats['reuse_ratio']:.0%} | "
+        f"신규 연결 {http_stats['new_connections']:,}회 (평균 {http_stats['avg_connect_ms']:.0f} ms) | "
+        f"평균 응답 {http_stats['avg_request_ms']:.0f} ms | 풀 크기 {http_stats['pool_size']}"
+    )
+    writer_stats = get_writer_stats()
+    st.caption(
+        f"DB 쓰기: {writer_stats['ops']:,}건 / 트랜잭션 {writer_stats['transactions']:,}회 | "
+        f"대기 {writer_stats['queued']}건 | 실패 {writer_stats['errors']}건"
+    )
+    limiter_state = limiter.get_state()
+    st.caption(
+        f"호출 제한: 초당 {limiter_state['rate']:g}회 | "
+        f"동시 요청 한도 {limiter_state['concurrency']:.1f} | "
+        f"429 수신 {limiter_state['throttled']:,}회"
+    )
+
+    st.divider()
+
     # ── DB 관리 ──
     st.subheader("데이터 관리")
 
@@ -149,22 +246,77 @@ def render():
             size_mb = DB_PATH.stat().st_size / (1024 * 1024)
             st.caption(f"DB 파일: {DB_PATH.name} ({size_mb:.2f} MB)")
 
-            with open(str(DB_PATH), "rb") as f:
+            # 버튼을 눌렀을 때만 온라인 백업으로 압축 스냅샷 생성 (이전 파일은 삭제),
+            # 다운로드 버튼은 클릭했을 때만 파일을 읽는다
+            if st.button("💾 DB 백업 만들기", use_container_width=True):
+                with st.spinner("백업 생성 중..."):
+                    downloads.replace(st.session_state, "backup_file", create_backup(),
+                                      mime="application/gzip")
+            backup = st.session_state.get("backup_file")
+            if backup is not None and backup.exists():
                 st.download_button(
-                    "💾 DB 백업 다운로드",
-                    data=f.read(),
-                    file_name=f"tracker_backup_{datetime.now().strftime('%Y%m%d_%H%M')}.db",
-                    mime="application/octet-stream",
+                    f"📥 백업 다운로드 (.db.gz, {backup.size_mb:.2f} MB)",
+                    data=backup.reader(),
+                    file_name=backup.file_name,
+                    mime=backup.mime,
                     use_container_width=True,
                 )
+
+            backup_keep = int(settings.get("backup_keep", str(BACKUP_KEEP)))
+            new_keep = st.number_input("정기 백업 보관 개수 (0=사용 안 함)", min_value=0, max_value=60,
+                                       value=backup_keep)
+            if st.button("백업 설정 저장", use_container_width=True):
+                set_setting("backup_keep", str(int(new_keep)))
+                st.success("백업 설정 저장 완료")
+            backups = list_backups()
+            st.caption(
+                f"스케줄 체크 후 자동 백업 — 보관 {len(backups)}개"
+                + (f", 최근 {backups[0].name}" if backups else "")
+            )
     with db_col2:
+        retention_days = get_retention_days()
+        new_retention = st.number_input(
+            "원본 이력 보관 기간 (일, 0=무기한)", min_value=0, max_value=3650,
+            value=retention_days, step=30,
+        )
+        if new_retention and new_retention < 7:
+            st.caption("보관 기간은 최소 7일입니다.")
+        archive_stats = get_archive_stats()
+        st.caption(
+            f"기간이 지난 원본 이력·알림 로그는 월별 압축 아카이브로 이동합니다 (시간별/일별 집계는 유지). "
+            f"아카이브 {archive_stats['files']}개, {archive_stats['size_mb']:.2f} MB | "
+            f"마지막 정리: {settings.get('last_retention_time', '없음')}"
+        )
+        rcol1, rcol2 = st.columns(2)
+        with rcol1:
+            if st.button("보관 기간 저장", use_container_width=True):
+                set_setting("retention_days", str(0 if not new_retention else max(7, int(new_retention))))
+                st.success("보관 기간 저장 완료")
+        with rcol2:
+            if st.button("🗄️ 지금 정리", use_container_width=True):
+                with st.spinner("아카이브 이동 중..."):
+                    moved = run_retention()
+                st.success(f"이력 {moved['rank_history']:,}건, 알림 로그 {moved['alert_logs']:,}건 아카이브 완료")
+
+        # 기존 DB는 전체 VACUUM 1회로 전환해야 정리 후 파일이 줄어든다 — 오래 걸리므로 직접 실행
+        if not is_incremental_vacuum():
+            st.caption(
+                f"이 DB는 정리 후에도 파일 크기가 줄지 않습니다 (빈 페이지 {get_freelist_pages():,}개). "
+                "한 번 전환하면 이후 정리 때마다 조금씩 반환합니다. 전환 중에는 체크 결과 저장이 잠시 대기합니다."
+            )
+            if st.button("🧹 DB 파일 압축 모드로 전환 (VACUUM 1회)", use_container_width=True):
+                with st.spinner("VACUUM 실행 중..."):
+                    convert_to_incremental_vacuum()
+                st.success(f"전환 완료 — DB 파일 {DB_PATH.stat().st_size / (1024 * 1024):.2f} MB")
+
         st.caption("DB 파일을 백업한 후 초기화할 수 있습니다.")
         if st.button("⚠️ DB 초기화", use_container_width=True):
             st.warning("정말 DB를 초기화하시겠습니까? 모든 데이터가 삭제됩니다.")
             if st.button("확인 — DB 초기화 실행", type="primary"):
+                from core.db_manager import init_db, close_connections
+                close_connections()
                 if DB_PATH.exists():
                     DB_PATH.unlink()
-                from core.db_manager import init_db
                 init_db()
                 st.success("DB 초기화 완료")
                 st.rerun()
@@ -0,0 +1,22 @@
+"""테스트 공용 픽스처 — 임시 폴더의 빈 DB로 db_manager를 돌린다"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+from core import db_manager  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """tmp_path/tracker.db로 초기화한 db_manager 모듈"""
+    db_manager.close_connections()
+    path = tmp_path / "tracker.db"
+    monkeypatch.setattr(config, "DB_PATH", path)
+    monkeypatch.setattr(db_manager, "DB_PATH", path)
+    db_manager.init_db()
+    yield db_manager
+    db_manager.close_connections()
@@ -0,0 +1,99 @@
+"""plan_run 예산 배분 — 예산 안이면 그대로, 넘치면 낮은 우선순위부터 깊이 축소 → 제외"""
+from datetime import datetime
+
+import pytest
+
+from config import MAX_PAGES
+from core import planner
+
+
+def _keywords(n):
+    return [{"id": i, "keyword": f"키워드{i}", "sort_type": "sim"} for i in range(n)]
+
+
+@pytest.fixture
+def ranked(monkeypatch):
+    """
+    키워드 id → 최근 순위로 통계를 흉내 낸다 (None이면 최근 체크에서 순위권 밖).
+
+    반환한 함수로 (keywords, prior_ranks)를 만든다.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def make(ranks):
+        stats = {i: {"best_rank": r, "worst_rank": r, "last_checked_at": now}
+                 for i, r in enumerate(ranks)}
+        monkeypatch.setattr(planner, "get_rank_stats", lambda days: stats)
+        return _keywords(len(ranks)), dict(enumerate(ranks))
+
+    return make
+
+
+def _pages(plan):
+    return {item.keyword["id"]: item.max_pages for item in plan.items}
+
+
+def test_within_budget_keeps_estimates_and_orders_by_priority(ranked):
+    keywords, prior = ranked([250, 2, None])
+    plan = planner.plan_run(keywords, prior, budget=100)
+
+    assert not plan.tight
+    assert plan.skipped == []
+    assert plan.projected_calls == 3 + 1 + MAX_PAGES
+    assert [item.keyword["id"] for item in plan.items] == [1, 0, 2]
+    assert all(item.max_pages is None for item in plan.items)
+
+
+def test_rows_sharing_keyword_and_sort_count_once(ranked):
+    keywords, prior = ranked([5, 8])
+    keywords[1]["keyword"] = keywords[0]["keyword"]
+    plan = planner.plan_run(keywords, prior, budget=100)
+
+    assert plan.groups == 1
+    assert plan.projected_calls == 1
+
+
+def test_tight_budget_cuts_low_priority_depth_before_skipping(ranked):
+    # 상위권 5개(1페이지) + 순위권 밖 5개(MAX_PAGES) = 55 > 30
+    keywords, prior = ranked([2, 5, 15, 45, 80, None, None, None, None, None])
+    plan = planner.plan_run(keywords, prior, budget=30)
+
+    assert plan.tight
+    assert plan.skipped == []
+    assert plan.projected_calls == 30
+    pages = _pages(plan)
+    assert all(pages[i] == 1 for i in range(5))  # 상위권은 예상치 그대로
+    assert sum(pages.values()) == 30
+    # 우선순위가 낮은(뒤쪽) 그룹부터 1페이지까지 줄였다
+    out_of_range = [pages[item.keyword["id"]] for item in plan.items if item.keyword["id"] >= 5]
+    assert out_of_range == sorted(out_of_range, reverse=True)
+    assert out_of_range[-1] == 1
+
+
+def test_skips_lowest_priority_only_when_one_page_each_does_not_fit(ranked):
+    keywords, prior = ranked([2, 5, 15, None, None])
+    plan = planner.plan_run(keywords, prior, budget=3)
+
+    assert [item.keyword["id"] for item in plan.items] == [0, 1, 2]
+    assert set(_pages(plan).values()) == {1}
+    assert sorted(item.keyword["id"] for item in plan.skipped) == [3, 4]
+    assert plan.projected_calls == 3
+
+
+def test_zero_budget_skips_everything(ranked):
+    keywords, prior = ranked([2, None])
+    plan = planner.plan_run(keywords, prior, budget=0)
+
+    assert plan.items == []
+    assert len(plan.skipped) == 2
+    assert plan.projected_calls == 0
+
+
+@pytest.mark.parametrize("budget", range(1, 25))
+def test_projected_calls_never_exceed_budget(ranked, budget):
+    keywords, prior = ranked([1, 150, 420, None, 999, None])
+    plan = planner.plan_run(keywords, prior, budget=budget)
+
+    assert plan.projected_calls <= budget
+    assert plan.projected_calls == sum(_pages(plan).values())
+    assert len(plan.items) + len(plan.skipped) == len(keywords)
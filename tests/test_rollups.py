@@ -0,0 +1,83 @@
+"""시간별/일별 롤업 — 증분 갱신, 기존 DB 백필, 조회"""
+import pytest
+
+from core.db_manager import ROLLUP_BUCKETS
+
+_ROLLUP_FIELDS = ("checks", "ranked", "out_count", "min_rank", "max_rank",
+                  "sum_rank", "last_rank", "last_price")
+
+
+def _record(keyword_id, rank, price=1000):
+    return {"keyword_id": keyword_id, "rank": rank, "title": "상품", "mall_name": "스토어",
+            "price": price, "link": "https://example.com/p", "product_id": "p1"}
+
+
+def _rollups(db, table):
+    with db.get_conn() as conn:
+        return [dict(r) for r in conn.execute(
+            f"SELECT * FROM {table} ORDER BY keyword_id, bucket"
+        )]
+
+
+@pytest.mark.parametrize("table", list(ROLLUP_BUCKETS))
+def test_incremental_rollup_counts_ranked_and_out(db, table):
+    kid = db.add_keyword("텀블러", "mall", "스토어")
+    db.add_rank_records([_record(kid, 3, 1000), _record(kid, None, 0)])
+    db.add_rank_records([_record(kid, 7, 1200)])
+
+    rows = _rollups(db, table)
+    assert len(rows) == 1
+    row = rows[0]
+    assert {f: row[f] for f in _ROLLUP_FIELDS} == {
+        "checks": 3, "ranked": 2, "out_count": 1, "min_rank": 3, "max_rank": 7,
+        "sum_rank": 10, "last_rank": 7, "last_price": 1200,
+    }
+
+
+def test_out_of_range_only_bucket_keeps_null_ranks(db):
+    kid = db.add_keyword("텀블러", "mall", "스토어")
+    db.add_rank_records([_record(kid, None, 0), _record(kid, None, 0)])
+
+    row = _rollups(db, "rank_rollup_hourly")[0]
+    assert (row["checks"], row["ranked"], row["out_count"]) == (2, 0, 2)
+    assert row["min_rank"] is None and row["max_rank"] is None and row["last_rank"] is None
+
+
+def test_backfill_matches_incremental(db):
+    k1 = db.add_keyword("텀블러", "mall", "스토어")
+    k2 = db.add_keyword("머그컵", "title", "머그")
+    db.add_rank_records([_record(k1, 5), _record(k2, None, 0), _record(k1, 2, 900)])
+    db.add_rank_records([_record(k2, 40), _record(k1, None, 0)])
+    expected = {t: _rollups(db, t) for t in ROLLUP_BUCKETS}
+
+    # 롤업 도입 전 DB — 비어 있는 롤업 테이블을 이력에서 다시 채운다
+    def reset(conn):
+        for table in ROLLUP_BUCKETS:
+            conn.execute(f"DELETE FROM {table}")
+        db._backfill_rollups(conn)
+
+    db.submit_write(reset).result()
+    assert {t: _rollups(db, t) for t in ROLLUP_BUCKETS} == expected
+
+
+def test_rollup_history_reports_bucket_mean(db):
+    kid = db.add_keyword("텀블러", "mall", "스토어")
+    db.add_rank_records([_record(kid, 3), _record(kid, 6), _record(kid, None, 0)])
+
+    rows = db.get_rank_history(kid, days=30, resolution="hourly")
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["mean_rank"] == pytest.approx(4.5)
+    assert row["rank"] == 5  # 평균 4.5를 반올림한 정수 순위
+    assert (row["min_rank"], row["max_rank"], row["checks"], row["out_count"]) == (3, 6, 3, 1)
+
+
+def test_deleting_keyword_removes_its_rollups(db):
+    keep = db.add_keyword("텀블러", "mall", "스토어")
+    gone = db.add_keyword("머그컵", "mall", "스토어")
+    db.add_rank_records([_record(keep, 1), _record(gone, 2)])
+
+    db.delete_keyword(gone)
+
+    for table in ROLLUP_BUCKETS:
+        assert [r["keyword_id"] for r in _rollups(db, table)] == [keep]